@@ -1,13 +1,15 @@
 from datetime import datetime
+import os
 import random
 import re
 import sys
 sys.path.append('C:\\Users\\20202991\\Dropbox\\My PC (S20202991)\\Documents\\GitHub\\Confuente_Website\\2AMU10_Group43\\2AMU10\\competitive_sudoku')
 from sudokuai import SudokuAI
 from regionsudokuboard import RegionSudokuBoard
-from competitive_sudoku.sudoku import GameState, SudokuBoard, TabooMove, Move
-from competitive_sudoku.sudoku import load_sudoku
-from competitive_sudoku.execute import solve_sudoku
+from competitive_sudoku.sudoku import GameState, SudokuBoard, TabooMove, TabooMoves, Move
+from competitive_sudoku.sudoku import load_sudoku, load_sudoku_from_text
+from competitive_sudoku.oracle import MoveResult, WitnessOracle, classify_moves
+from competitive_sudoku.oracle_cache import OracleCache, board_text_key
 import math
 import numpy as np
 import copy
@@ -155,23 +157,37 @@ class NeuralNetwork:
             fp.write("%s\n" % bias)
     print('Updated file')
 
+# Memoizes the oracle answers, since the random openings reach the same positions again and again
+oracle_cache = OracleCache()
+
+# Keeps solutions of the current position, so that most moves are accepted without running the solver
+witness_oracle = None
+
 def is_taboo(board: RegionSudokuBoard, move: Move):
   """
   Determines if any move is a mistake move in the current position
   """
-  solve_sudoku_path = 'bin\\solve_sudoku.exe'
+  global witness_oracle
   board_text = str(board)
+  sudoku_board = load_sudoku_from_text(board_text)
+  if witness_oracle is None:
+    witness_oracle = WitnessOracle(sudoku_board)
+  else:
+    witness_oracle.sync(sudoku_board)
   options = f'--move "{(move.i*board.N+move.j)} {move.value}"'
-  output = solve_sudoku(solve_sudoku_path, board_text, options)
-  if 'has no solution' in output:
+  result = oracle_cache.get(board_text_key(board_text, options), lambda: witness_oracle.check_move(move))
+  if result.status == MoveResult.NO_SOLUTION:
     return True, 0
-  if 'The score is' in output:
-    match = re.search(r'The score is ([-\d]+)', output)
-    if match:
-      player_score = int(match.group(1))
-      return False, player_score
-    else:
-      raise RuntimeError(f'Unexpected output of sudoku solver: "{output}".')
+  if result.status == MoveResult.SCORED:
+    return False, result.score
+  raise RuntimeError(f'Unexpected answer of the sudoku oracle: "{result}".')
+
+def classify_position(board: RegionSudokuBoard, taboo_moves):
+  """
+  Determines for every move in the current position if it is a mistake move and what it scores, in one oracle call
+  """
+  results = classify_moves(load_sudoku_from_text(str(board)), taboo_moves)
+  return {key: (result.status != MoveResult.SCORED, result.score) for key, result in results.items()}
 
 def create_data(board: RegionSudokuBoard, game_state: GameState, main_nn: NeuralNetwork, count, alpha, gamma):
   """
@@ -184,10 +200,10 @@ def create_data(board: RegionSudokuBoard, game_state: GameState, main_nn: Neural
     startBoard = RegionSudokuBoard(game_state)
     scoredif = 0
     maximizing = True
-    taboo_moves = []
+    taboo_moves = TabooMoves()
     for __ in range(start_depth):
       possibleMoves, mistakeMoves = startBoard.get_moves(taboo_moves)
-      moves = [move for move in possibleMoves + mistakeMoves if TabooMove(move[0].i, move[0].j, move[0].value) not in taboo_moves]
+      moves = [move for move in possibleMoves + mistakeMoves if move[0] not in taboo_moves]
       move, cell = random.choice(moves)
       isTabooMove, score = is_taboo(startBoard, move)
       if isTabooMove:
@@ -205,23 +221,24 @@ def create_data(board: RegionSudokuBoard, game_state: GameState, main_nn: Neural
     output = [-100]*(board.N**3)
     afterMoveOutputs = []
     possibleMoves, mistakeMoves = startBoard.get_moves(taboo_moves)
-    moves = [move for move in possibleMoves + mistakeMoves if TabooMove(move[0].i, move[0].j, move[0].value) not in taboo_moves]
+    moves = [move for move in possibleMoves + mistakeMoves if move[0] not in taboo_moves]
+    classification = classify_position(startBoard, taboo_moves)
     for move, cell in moves:
       move_index = move.i*(board.N**2)+move.j*board.N+move.value-1
-      isTabooMove, score = is_taboo(startBoard, move)
+      isTabooMove, score = classification[(move.i, move.j, move.value)]
       if isTabooMove:
         new_taboo_moves = taboo_moves
         new_taboo_moves.append(TabooMove(move.i, move.j, move.value))
         nextInput = input_vector(startBoard, new_taboo_moves)
         nextOutput = main_nn.call(nextInput)
-        minOutput = min([nextOutput[move[0].i*(board.N**2)+move[0].j*board.N+move[0].value-1] for move in moves if TabooMove(move[0].i, move[0].j, move[0].value) not in new_taboo_moves])
+        minOutput = min([nextOutput[move[0].i*(board.N**2)+move[0].j*board.N+move[0].value-1] for move in moves if move[0] not in new_taboo_moves])
         output[move_index] = nn_output[move_index] + alpha*(score + gamma*minOutput - nn_output[move_index])
-        nextMoveIndices = [move[0].i*(board.N**2)+move[0].j*board.N+move[0].value-1 for move in moves if TabooMove(move[0].i, move[0].j, move[0].value) not in new_taboo_moves]
+        nextMoveIndices = [move[0].i*(board.N**2)+move[0].j*board.N+move[0].value-1 for move in moves if move[0] not in new_taboo_moves]
         afterMoveOutputs.append((move_index, scoredif, score, nextInput, nextMoveIndices))
       else:
         startBoard.makeMove(move, cell)
         newPossibleMoves, newMistakeMoves = startBoard.get_moves(taboo_moves)
-        newMoves = [move for move in newPossibleMoves + newMistakeMoves if TabooMove(move[0].i, move[0].j, move[0].value) not in taboo_moves]
+        newMoves = [move for move in newPossibleMoves + newMistakeMoves if move[0] not in taboo_moves]
         nextInput = input_vector(startBoard, taboo_moves)
         startBoard.unmakeMove(move, cell)
         minOutput = 0
@@ -230,9 +247,9 @@ def create_data(board: RegionSudokuBoard, game_state: GameState, main_nn: Neural
           else: minOutput = -100
         else:
           nextOutput = main_nn.call(nextInput)
-          minOutput = min([nextOutput[move[0].i*(board.N**2)+move[0].j*board.N+move[0].value-1] for move in newMoves if TabooMove(move[0].i, move[0].j, move[0].value) not in taboo_moves])
+          minOutput = min([nextOutput[move[0].i*(board.N**2)+move[0].j*board.N+move[0].value-1] for move in newMoves if move[0] not in taboo_moves])
         output[move_index] = nn_output[move_index] + alpha*(score + gamma*minOutput - nn_output[move_index])
-        nextMoveIndices = [move[0].i*(board.N**2)+move[0].j*board.N+move[0].value-1 for move in newMoves if TabooMove(move[0].i, move[0].j, move[0].value) not in taboo_moves]
+        nextMoveIndices = [move[0].i*(board.N**2)+move[0].j*board.N+move[0].value-1 for move in newMoves if move[0] not in taboo_moves]
         afterMoveOutputs.append((move_index, scoredif, score, nextInput, nextMoveIndices))
     data.append((input, output, afterMoveOutputs))
     timenow = datetime.now()
@@ -273,7 +290,7 @@ def input_vector(board: RegionSudokuBoard, taboo_moves):
     if cell.value != 0:
       input[cell.i*(board.N**2)+cell.j*board.N+cell.value-1] = 1
   possibleMoves, mistakeMoves = board.get_moves(taboo_moves)
-  moves = [move for move in possibleMoves + mistakeMoves if TabooMove(move[0].i, move[0].j, move[0].value) not in taboo_moves]
+  moves = [move for move in possibleMoves + mistakeMoves if move[0] not in taboo_moves]
   for move, cell in moves:
     input[board.N**3+move.i*(board.N**2)+move.j*board.N+move.value-1] = 1
   return input
@@ -391,8 +408,8 @@ def main():
       main_nn.train(train=train, validation=validation, start_learning_rate=0.00001, end_learning_rate=0.000001)
       print("iteration "+str(iter)+" trained")
       
-      # Store the neural net
-      main_nn.print_to_file("trained_weights.txt")
+      # Store the neural net in the folder of the player that uses it
+      main_nn.print_to_file(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "team43_A3_NN", "trained_weights.txt"))
       
       # Update the data for the next output step
       update_data(data, main_nn, board.N, 0.1, 0.9)
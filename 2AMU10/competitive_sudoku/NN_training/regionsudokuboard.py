@@ -154,7 +154,7 @@ class RegionSudokuBoard(object):
                 
                 # If this position with this value is a taboo move in the list,
                 # then this is not possible and we go to the next value
-                if TabooMove(i, j, value) in tabooMoves:
+                if tabooMoves.contains(i, j, value):
                     continue
                 
                 # If in the row, column or box that this cell is in already contains this value,
@@ -5,7 +5,7 @@
 import random
 import time
 import math
-from competitive_sudoku.sudoku import GameState, Move, SudokuBoard, TabooMove
+from competitive_sudoku.sudoku import BitmaskSudokuBoard, GameState, Move, SudokuBoard, TabooMove
 import competitive_sudoku.sudokuai
 from typing import List
 
@@ -22,20 +22,12 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
 
     # N.B. This is a very naive implementation.
     def compute_best_move(self, game_state: GameState) -> None:
-        board = game_state.board
+        board = BitmaskSudokuBoard.from_board(game_state.board)
         N = board.N
         n = board.n
         m = board.m
-        first = True
-        all_moves = []
-        for i in range(N):
-            for j in range(N):
-                for value in range(1, N+1):
-                    if SudokuAI.possible(i, j, value, board, game_state.taboo_moves, n, m, N):
-                        if first:
-                            first = False
-                            self.propose_move(Move(i, j, value))
-                        all_moves.append(Move(i, j, value))
+        all_moves = board.legal_moves(game_state.taboo_moves)
+        self.propose_move(all_moves[0])
         randomMove = random.choice(all_moves)
         self.propose_move(randomMove)
         depth = 0
@@ -109,34 +101,6 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
     def box(i, j, n, m, N):
         return [(k,l) for k in range((i//m)*m, (i//m)*m+m) for l in range((j//n)*n, (j//n)*n+n)]
     
-    def possible(i, j, value, board, tabooMoves, n, m, N):
-        if board.get(i, j) != SudokuBoard.empty \
-                or TabooMove(i, j, value) in tabooMoves:
-            return False
-        #print("possible "+str(i)+" "+str(j)+" "+str(value))
-        for (k,l) in SudokuAI.row(i,j, n, m, N):
-            #print("row "+str(k)+" "+str(l))
-            if board.get(k,l) == value and (k != i or l != j):
-                return False
-        for (k,l) in SudokuAI.col(i,j, n, m, N):
-            #print("col "+str(k)+" "+str(l))
-            if board.get(k,l) == value and (k != i or l != j):
-                return False
-        for (k,l) in SudokuAI.box(i,j, n, m, N):
-            #print("box "+str(k)+" "+str(l))
-            if board.get(k,l) == value and (k != i or l != j):
-                return False
-        return True
-    
-    def possibleMoves(board: SudokuBoard, tabooMoves: List[TabooMove]) -> List[Move]:
-        N = board.N
-        n = board.n
-        m = board.m
-        moves = []
-        for i in range(N):
-            for j in range(N):
-                for value in range(1, N+1):
-                    if SudokuAI.possible(i, j, value, board, tabooMoves, n, m, N):
-                        moves.append(Move(i, j, value))
-        return moves
+    def possibleMoves(board: BitmaskSudokuBoard, tabooMoves: List[TabooMove]) -> List[Move]:
+        return board.legal_moves(tabooMoves)
 
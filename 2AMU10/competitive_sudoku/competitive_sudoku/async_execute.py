@@ -0,0 +1,100 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# An asyncio counterpart of competitive_sudoku.execute, for running many solve_sudoku queries concurrently.
+
+import asyncio
+import os
+import shlex
+import tempfile
+from typing import Iterable, List, Optional, Tuple
+
+
+async def execute_command_async(args: List[str], timeout: Optional[float] = None) -> str:
+    """
+    Executes a program without using a shell.
+    @param args: The program followed by its arguments.
+    @param timeout: The maximum time in seconds that the program may run, or None.
+    @return: The combined stdout and stderr of the program.
+    @raise asyncio.TimeoutError: If the program did not finish in time. The program is killed in that case, and also
+    when the calling task is cancelled.
+    """
+    process = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.STDOUT)
+    try:
+        output, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    return output.decode('utf-8').strip()
+
+
+class AsyncOracle(object):
+    """
+    Runs solve_sudoku queries concurrently, with at most a given number of solve_sudoku processes at the same time.
+    """
+
+    def __init__(self, solve_sudoku_path: str, concurrency: Optional[int] = None, timeout: Optional[float] = None):
+        """
+        @param solve_sudoku_path: The location of the solve_sudoku executable.
+        @param concurrency: The maximum number of simultaneous queries (default: the number of CPUs).
+        @param timeout: The maximum time in seconds for a single query, or None.
+        """
+        if not os.path.exists(solve_sudoku_path):
+            raise RuntimeError(f'No oracle found at location "{solve_sudoku_path}"')
+        self.solve_sudoku_path = solve_sudoku_path
+        self.concurrency = concurrency or os.cpu_count() or 1
+        self.timeout = timeout
+        self._semaphore = None
+
+    async def solve_sudoku(self, board_text: str, options: str = '') -> str:
+        """
+        Has the same effect as competitive_sudoku.execute.solve_sudoku.
+        @param board_text: A string representation of a sudoku board.
+        @param options: Additional command line options.
+        @return: The output of solve_sudoku.
+        """
+        # The semaphore is created lazily, so that it belongs to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            with tempfile.NamedTemporaryFile('w', prefix='solve_sudoku_', delete=False) as file:
+                file.write(board_text)
+            try:
+                args = [self.solve_sudoku_path, file.name] + shlex.split(options)
+                return await execute_command_async(args, self.timeout)
+            finally:
+                os.remove(file.name)
+
+    async def solve_many(self, queries: Iterable[Tuple[str, str]]) -> List[str]:
+        """
+        Runs a number of queries concurrently.
+        @param queries: Pairs of a board text and options.
+        @return: The outputs of solve_sudoku, in the order of the queries.
+        """
+        tasks = [asyncio.ensure_future(self.solve_sudoku(board_text, options)) for board_text, options in queries]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            # Do not leave the other queries running when one of them fails or the caller is cancelled
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+
+def solve_sudoku_many(solve_sudoku_path: str, queries: Iterable[Tuple[str, str]], concurrency: Optional[int] = None,
+                      timeout: Optional[float] = None) -> List[str]:
+    """
+    Runs a number of solve_sudoku queries concurrently, for callers that do not use asyncio themselves.
+    @param solve_sudoku_path: The location of the solve_sudoku executable.
+    @param queries: Pairs of a board text and options.
+    @param concurrency: The maximum number of simultaneous queries (default: the number of CPUs).
+    @param timeout: The maximum time in seconds for a single query, or None.
+    @return: The outputs of solve_sudoku, in the order of the queries.
+    """
+    oracle = AsyncOracle(solve_sudoku_path, concurrency, timeout)
+    return asyncio.run(oracle.solve_many(queries))
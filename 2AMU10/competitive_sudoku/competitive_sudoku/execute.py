@@ -3,14 +3,14 @@
 #  https://www.gnu.org/licenses/gpl-3.0.txt)
 
 import os
-from pathlib import Path
 import tempfile
+from typing import Optional
 
 
-def execute_command(command: str) -> str:
+def execute_command(command: str, cwd: Optional[str] = None) -> str:
     import subprocess
     try:
-        output = subprocess.check_output(command, stderr=subprocess.STDOUT, shell=True)
+        output = subprocess.check_output(command, stderr=subprocess.STDOUT, shell=True, cwd=cwd)
     except subprocess.CalledProcessError as proc:
         output = proc.output
     return output.decode("utf-8").strip()
@@ -26,7 +26,10 @@ def solve_sudoku(solve_sudoku_path: str, board_text: str, options: str='') -> st
     """
     if not os.path.exists(solve_sudoku_path):
         raise RuntimeError(f'No oracle found at location "{solve_sudoku_path}"')
-    filename = tempfile.NamedTemporaryFile(prefix='solve_sudoku_').name
-    Path(filename).write_text(board_text)
-    command = f'{solve_sudoku_path} {filename} {options}'
-    return execute_command(command)
+    with tempfile.NamedTemporaryFile('w', prefix='solve_sudoku_', delete=False) as file:
+        file.write(board_text)
+    try:
+        command = f'{solve_sudoku_path} {file.name} {options}'
+        return execute_command(command)
+    finally:
+        os.remove(file.name)
@@ -0,0 +1,223 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# A job queue for playing games on several machines. A GameBroker is a TCP server that hands out jobs to workers and
+# collects their results. A worker connects to the broker for every request, and sends one JSON object per line:
+#
+#   {"type": "get"}                                       the reply is {"job": <job>} or {"job": null, "done": <bool>}
+#   {"type": "result", "id": <id>, "result": <result>}    the reply is {"ok": true}
+#   {"type": "reject", "id": <id>, "reason": <text>}      the reply is {"ok": true}
+#
+# A job is a dictionary with at least the field "id"; the other fields are up to the user of the broker. A result is
+# a dictionary as well. If there is no job available the worker should ask again later, unless done is true, which
+# means that all jobs have been finished. A job that is handed out is leased to the worker. If the worker does not
+# return a result before the lease expires, e.g. because its machine crashed, the job is handed out again. A worker
+# that cannot play a job, e.g. because its code differs from the code of the broker, rejects it and stops. The job is
+# then handed out again, unless it has been rejected max_attempts times; then its result is {"error": <reason>}.
+
+import collections
+import json
+import queue
+import socket
+import socketserver
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class JobRejected(Exception):
+    """
+    Is raised by the play function of a worker if it cannot play a job. The job is handed back to the broker, and the
+    worker stops.
+    """
+    pass
+
+
+class GameBroker(object):
+    """
+    Hands out jobs to workers, and collects their results.
+    """
+
+    def __init__(self, jobs: List[Dict], host: str = 'localhost', port: int = 0, lease_time: float = 600.0, max_attempts: int = 3):
+        """
+        @param jobs: The jobs. Every job gets a field "id" with its index in this list.
+        @param host: The interface on which the broker listens. Use '' to accept workers from other machines.
+        @param port: The port on which the broker listens, or 0 to let the operating system choose one.
+        @param lease_time: The time in seconds after which an unfinished job is handed out again.
+        @param max_attempts: The number of times that a job can be rejected before it is given up.
+        """
+        self.jobs = [dict(job, id=index) for index, job in enumerate(jobs)]
+        self.lease_time = lease_time
+        self.max_attempts = max_attempts
+        self.pending = collections.deque(self.jobs)
+        self.leases: Dict[int, float] = {}    # the deadlines of the jobs that have been handed out
+        self.rejections: Dict[int, int] = collections.Counter()
+        self.finished = set()
+        self.last_contact = time.time()       # the time of the last request of a worker
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+
+        broker = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        reply = broker._handle(json.loads(line))
+                    except (ValueError, KeyError, TypeError) as err:
+                        reply = {'error': f'invalid request: {err}'}
+                    self.wfile.write((json.dumps(reply) + '\n').encode())
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self.server = Server((host, port), Handler)
+        self.address: Tuple[str, int] = self.server.server_address[:2]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def _handle(self, request: Dict) -> Dict:
+        with self.lock:
+            self.last_contact = time.time()
+        if request['type'] == 'get':
+            job = self._next_job()
+            if job is not None:
+                return {'job': job}
+            with self.lock:
+                return {'job': None, 'done': len(self.finished) == len(self.jobs)}
+        if request['type'] == 'result':
+            self._finish(request['id'], request['result'])
+            return {'ok': True}
+        if request['type'] == 'reject':
+            self._reject(request['id'], request.get('reason', 'unknown reason'))
+            return {'ok': True}
+        return {'error': f'unknown request type {request["type"]}'}
+
+    def _next_job(self) -> Optional[Dict]:
+        with self.lock:
+            now = time.time()
+            if not self.pending:
+                # hand out a job again if its worker did not finish it in time
+                for job_id, deadline in self.leases.items():
+                    if deadline < now:
+                        self.pending.append(self.jobs[job_id])
+                        break
+            if not self.pending:
+                return None
+            job = self.pending.popleft()
+            self.leases[job['id']] = now + self.lease_time
+            return job
+
+    def _finish(self, job_id: int, result: Dict) -> None:
+        with self.lock:
+            # a job that was handed out twice may be finished twice; only the first result counts
+            if job_id in self.finished:
+                return
+            self.finished.add(job_id)
+            self.leases.pop(job_id, None)
+        self.queue.put((self.jobs[job_id], result))
+
+    def _reject(self, job_id: int, reason: str) -> None:
+        with self.lock:
+            if job_id in self.finished:
+                return
+            self.leases.pop(job_id, None)
+            self.rejections[job_id] += 1
+            if self.rejections[job_id] < self.max_attempts:
+                self.pending.append(self.jobs[job_id])
+                return
+        self._finish(job_id, {'error': f'the job was rejected {self.max_attempts} times, the last time because {reason}'})
+
+    def results(self, poll_interval: float = 1.0) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Waits for the results of all jobs. Since a worker reports a job before its lease expires, all workers must be
+        gone if none of them contacted the broker during lease_time seconds, and then the waiting is given up.
+        @param poll_interval: The time in seconds between two checks for workers.
+        @return: A generator of pairs (job, result) in the order in which the results arrive.
+        """
+        for _ in range(len(self.jobs)):
+            while True:
+                try:
+                    result = self.queue.get(timeout=poll_interval)
+                    break
+                except queue.Empty:
+                    with self.lock:
+                        idle_time = time.time() - self.last_contact
+                        unfinished = len(self.jobs) - len(self.finished)
+                    if idle_time > self.lease_time:
+                        raise RuntimeError(f'no worker contacted the broker during {idle_time:.0f} seconds, '
+                                           f'{unfinished} jobs are unfinished')
+            yield result
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def send_request(address: Tuple[str, int], request: Dict, timeout: float = 30.0) -> Dict:
+    """
+    Sends a request to a broker.
+    @param address: The host and port of the broker.
+    @param request: The request.
+    @param timeout: The time in seconds after which an unresponsive broker is given up.
+    @return: The reply of the broker.
+    """
+    with socket.create_connection(address, timeout=timeout) as connection:
+        connection.sendall((json.dumps(request) + '\n').encode())
+        with connection.makefile('rb') as stream:
+            line = stream.readline()
+    if not line:
+        raise ConnectionError('the broker closed the connection')
+    return json.loads(line)
+
+
+def run_worker(address: Tuple[str, int], play: Callable[[Dict], Dict], poll_interval: float = 1.0, patience: float = 30.0) -> int:
+    """
+    Plays the jobs of a broker until all jobs are finished, or until a job is rejected.
+    @param address: The host and port of the broker.
+    @param play: A function that computes the result of a job. It raises JobRejected if it cannot play the job.
+    @param poll_interval: The time in seconds between two requests if no job is available.
+    @param patience: The time in seconds after which the worker stops if it cannot reach the broker.
+    @return: The number of jobs that this worker finished.
+    """
+    count = 0
+    unreachable_since = None
+    while True:
+        try:
+            reply = send_request(address, {'type': 'get'})
+        except OSError:
+            # the broker is not running (yet), or it has stopped after receiving all results
+            unreachable_since = unreachable_since or time.time()
+            if time.time() - unreachable_since > patience:
+                return count
+            time.sleep(poll_interval)
+            continue
+        unreachable_since = None
+        job = reply.get('job')
+        if job is None:
+            if reply.get('done', False):
+                return count
+            time.sleep(poll_interval)
+            continue
+        try:
+            result = play(job)
+        except JobRejected as err:
+            try:
+                send_request(address, {'type': 'reject', 'id': job['id'], 'reason': str(err)})
+            except OSError:
+                pass
+            return count
+        try:
+            send_request(address, {'type': 'result', 'id': job['id'], 'result': result})
+        except OSError:
+            # the result is lost; the broker hands out the job again when its lease expires
+            continue
+        count += 1
@@ -0,0 +1,65 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# A compact record of a game in the JSON lines format. Every move that is played gets one line, for example
+#
+#   {"turn": 3, "player": 1, "move": [0, 2, 4], "reward": 1, "taboo": false, "proposals": 12, "think_time": 0.5012}
+#
+# where move is [i, j, value], taboo tells if the oracle declared the move taboo, proposals is the number of calls to
+# propose_move and think_time is the time in seconds that the player used for the move.
+
+import json
+from typing import Dict, Iterator
+
+from competitive_sudoku.sudoku import Move
+
+
+class GameRecorder(object):
+    """
+    Writes the moves of a game to a JSON lines file.
+    """
+
+    def __init__(self, path: str):
+        """
+        @param path: The location of the record. An existing file is overwritten.
+        """
+        self.path = path
+        self.file = open(path, 'w')
+        self.turn = 0
+
+    def record(self, player_number: int, move: Move, reward: int, taboo: bool, proposals: int, think_time: float) -> None:
+        """
+        Appends a move to the record.
+        @param player_number: The player that played the move (1 or 2).
+        @param move: The move.
+        @param reward: The points that the player scored with the move.
+        @param taboo: True if the move turned out to be a taboo move.
+        @param proposals: The number of moves that the player proposed.
+        @param think_time: The time in seconds that the player used for the move.
+        """
+        self.turn += 1
+        line = {'turn': self.turn, 'player': player_number, 'move': [move.i, move.j, move.value], 'reward': reward,
+                'taboo': taboo, 'proposals': proposals, 'think_time': round(think_time, 4)}
+        self.file.write(json.dumps(line) + '\n')
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_game_record(path: str) -> Iterator[Dict]:
+    """
+    Reads a record that was written by GameRecorder, one move at a time.
+    @param path: The location of the record.
+    @return: A generator of dictionaries with the fields of the moves.
+    """
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,59 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import multiprocessing
+from typing import Iterator, Tuple
+
+
+class BestMoveSlot(object):
+    """
+    Shared memory that holds the best move of a player. There is a single writer (the process that computes the
+    move) and any number of readers, and none of them takes a lock.
+
+    The memory contains a sequence number followed by two buffers (i, j, value). A move is written to the buffer that
+    is not in use, after which the sequence number is incremented to publish it. The published move is in buffer
+    sequence % 2. A reader retries if the sequence number changed while it was reading, since the writer may have
+    started to overwrite the buffer it read from. The published buffer is never modified, so the writer can be
+    terminated at any moment without corrupting the move.
+    """
+
+    def __init__(self):
+        self.memory = multiprocessing.RawArray('q', 7)
+
+    def store(self, i: int, j: int, value: int) -> None:
+        """
+        Publishes a move. May only be called by the writer.
+        """
+        memory = self.memory
+        sequence = memory[0] + 1
+        offset = 1 + 3 * (sequence % 2)
+        memory[offset] = i
+        memory[offset + 1] = j
+        memory[offset + 2] = value
+        memory[0] = sequence
+
+    def load(self) -> Tuple[int, int, int]:
+        """
+        @return: The last published move as a tuple (i, j, value).
+        """
+        memory = self.memory
+        while True:
+            sequence = memory[0]
+            offset = 1 + 3 * (sequence % 2)
+            move = (memory[offset], memory[offset + 1], memory[offset + 2])
+            if memory[0] == sequence:
+                return move
+
+    def version(self) -> int:
+        """
+        @return: The number of moves that have been published so far. The difference between two versions is the
+        number of proposals in between.
+        """
+        return self.memory[0]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.load())
+
+    def __getitem__(self, index: int) -> int:
+        return self.load()[index]
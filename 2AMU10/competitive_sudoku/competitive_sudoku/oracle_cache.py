@@ -0,0 +1,126 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import hashlib
+import os
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from competitive_sudoku.sudoku import Move, SudokuBoard
+
+
+def board_text_key(board_text: str, options: str = '') -> str:
+    """
+    Computes a cache key for a solve_sudoku query. Differences in white space in the board text are ignored.
+    @param board_text: A string representation of a sudoku board.
+    @param options: The command line options of the query.
+    @return: A hexadecimal hash of the query.
+    """
+    text = ' '.join(board_text.split()) + '\0' + ' '.join(options.split())
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def move_key(board: SudokuBoard, move: Move) -> str:
+    """
+    Computes a cache key for the verdict of the oracle on a move.
+    @param board: A sudoku board.
+    @param move: A move.
+    @return: A hexadecimal hash of the board contents and the move.
+    """
+    text = f'{board.m} {board.n} {" ".join(map(str, board.squares))} | {move.i} {move.j} {move.value}'
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class OracleCache(object):
+    """
+    A memoizing cache for oracle answers, with least recently used eviction. If a path is given, the entries are
+    loaded from and saved to that file, so that they survive across games and matches.
+    """
+
+    def __init__(self, capacity: int = 100000, path: Optional[str] = None):
+        """
+        @param capacity: The maximum number of entries that is kept in memory.
+        @param path: The location of the persistent store, or None.
+        """
+        self.capacity = capacity
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.miss_time = 0.0  # the total time in seconds spent on computing the answers of misses
+        if path and os.path.isfile(path):
+            self.entries.update(self._read(path))
+            self._evict()
+
+    @staticmethod
+    def _read(path: str) -> OrderedDict:
+        try:
+            with open(path, 'rb') as handle:
+                return pickle.load(handle)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return OrderedDict()
+
+    def _evict(self) -> None:
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def get(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Looks up the answer for key. If it is not in the cache, it is computed and stored.
+        @param key: A cache key, see board_text_key and move_key.
+        @param compute: A function without arguments that computes the answer.
+        @return: The answer.
+        """
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        start_time = time.perf_counter()
+        value = compute()
+        self.miss_time += time.perf_counter() - start_time
+        self.entries[key] = value
+        self._evict()
+        return value
+
+    def solve_sudoku(self, solve_sudoku: Callable[[str, str], str], board_text: str, options: str = '') -> str:
+        """
+        A cached version of a solve_sudoku function.
+        @param solve_sudoku: A function that maps a board text and options to the output of solve_sudoku, for
+        example functools.partial(competitive_sudoku.execute.solve_sudoku, solve_sudoku_path).
+        @param board_text: A string representation of a sudoku board.
+        @param options: Additional command line options.
+        @return: The output of solve_sudoku.
+        """
+        return self.get(board_text_key(board_text, options), lambda: solve_sudoku(board_text, options))
+
+    def save(self) -> None:
+        """
+        Saves the entries to the persistent store, merged with the entries that other processes saved meanwhile.
+        """
+        if not self.path:
+            return
+        entries = self._read(self.path) if os.path.isfile(self.path) else OrderedDict()
+        entries.update(self.entries)
+        while len(entries) > self.capacity:
+            entries.popitem(last=False)
+        temporary_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(temporary_path, 'wb') as handle:
+            pickle.dump(entries, handle)
+        os.replace(temporary_path, self.path)
+
+    def saved_time(self) -> float:
+        """
+        Estimates the time that was saved by the cache, based on the average time of a miss.
+        @return: The estimated time in seconds.
+        """
+        return self.hits * self.miss_time / self.misses if self.misses else 0.0
+
+    def __str__(self):
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0
+        return f'Oracle cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate), ' \
+               f'estimated time saved {self.saved_time():.3f} seconds'
@@ -0,0 +1,167 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# A long-lived sudoku oracle. A worker is started once with
+#
+#   python3 -m competitive_sudoku.oracle_server
+#
+# and then answers queries that are sent over its stdin, one JSON object per line:
+#
+#   {"board": "<board in the format of SudokuBoard.__str__>", "options": "<solve_sudoku options>"}
+#
+# Every query is answered with one line {"output": "<output of solve_sudoku>"} on stdout. An OraclePool keeps a
+# few of these workers running, so that clients do not pay process startup and temporary files per query.
+
+import atexit
+import json
+import os
+import queue
+import shlex
+import subprocess
+import sys
+import threading
+from typing import IO, Optional
+
+from competitive_sudoku.solve_sudoku import options_parser, solve_sudoku_output
+from competitive_sudoku.sudoku import load_sudoku_from_text
+
+
+def answer_query(board_text: str, options: str) -> str:
+    """
+    Computes the output of solve_sudoku for a board, without writing it to a file.
+    @param board_text: A string representation of a sudoku board.
+    @param options: Additional command line options.
+    @return: The output of solve_sudoku.
+    """
+    try:
+        board = load_sudoku_from_text(board_text)
+    except (RuntimeError, ValueError) as err:
+        return f'Could not load board: {err}'
+    try:
+        args = options_parser().parse_args(shlex.split(options))
+    except SystemExit:
+        return f'Error in command line: {options}'
+    return solve_sudoku_output(board, args)
+
+
+def serve(stdin: IO[str], stdout: IO[str]) -> None:
+    """
+    Answers queries until stdin is closed.
+    @param stdin: The stream with queries.
+    @param stdout: The stream that receives the replies.
+    """
+    for line in stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            output = answer_query(request['board'], request.get('options', ''))
+        except (ValueError, KeyError, TypeError) as err:
+            output = f'Could not parse query: {err}'
+        stdout.write(json.dumps({'output': output}) + '\n')
+        stdout.flush()
+
+
+class OracleWorker(object):
+    """
+    A handle to a running oracle_server process.
+    """
+
+    def __init__(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ)
+        env['PYTHONPATH'] = root + os.pathsep + env.get('PYTHONPATH', '')
+        self.process = subprocess.Popen([sys.executable, '-m', 'competitive_sudoku.oracle_server'],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env, text=True, bufsize=1)
+
+    def query(self, board_text: str, options: str = '') -> str:
+        """
+        Sends a query to the worker and waits for the reply.
+        @param board_text: A string representation of a sudoku board.
+        @param options: Additional command line options of solve_sudoku.
+        @return: The output of solve_sudoku.
+        """
+        self.process.stdin.write(json.dumps({'board': board_text, 'options': options}) + '\n')
+        self.process.stdin.flush()
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError('The oracle worker stopped unexpectedly')
+        return json.loads(line)['output']
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def close(self) -> None:
+        if self.is_alive():
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process.stdout.close()
+
+
+class OraclePool(object):
+    """
+    A fixed number of oracle workers that can be shared by several threads. Every query is handled by an idle worker.
+    """
+
+    def __init__(self, size: int = 2):
+        """
+        @param size: The number of workers.
+        """
+        self.size = size
+        self.idle = queue.Queue()
+        for _ in range(size):
+            self.idle.put(OracleWorker())
+
+    def solve_sudoku(self, board_text: str, options: str = '') -> str:
+        """
+        Has the same effect as competitive_sudoku.execute.solve_sudoku, but uses one of the workers of the pool.
+        @param board_text: A string representation of a sudoku board.
+        @param options: Additional command line options.
+        @return: The output of solve_sudoku.
+        """
+        worker = self.idle.get()
+        try:
+            return worker.query(board_text, options)
+        except (RuntimeError, OSError, ValueError):
+            # The state of the worker is unknown, so it is replaced by a new one
+            worker.close()
+            worker = OracleWorker()
+            raise
+        finally:
+            self.idle.put(worker)
+
+    def close(self) -> None:
+        for _ in range(self.size):
+            self.idle.get().close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+_shared_pool: Optional[OraclePool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def shared_pool(size: int = 2) -> OraclePool:
+    """
+    Returns the oracle pool of this process. It is created on first use, and closed when the process exits.
+    @param size: The number of workers, if the pool still needs to be created.
+    @return: The pool.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = OraclePool(size)
+            atexit.register(_shared_pool.close)
+        return _shared_pool
+
+
+if __name__ == '__main__':
+    serve(sys.stdin, sys.stdout)
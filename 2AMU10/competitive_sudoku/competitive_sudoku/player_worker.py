@@ -0,0 +1,173 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# A long-lived process that computes the moves of one player during a whole game. The worker keeps its own copy of
+# the game state, and each turn it only receives the moves that were played since its previous turn.
+# A turn is ended by setting a stop event. The worker then raises StopComputation inside the player, either from
+# propose_move or, for a player that is busy searching, by interrupting its main thread. Hence the SudokuAI object
+# survives between moves, and data that it stores in self (caches, transposition tables, search trees) can be reused
+# in later moves. The taboo moves of the game state are restored after every turn, since a search that was interrupted
+# may not have taken back the taboo moves that it added temporarily.
+
+import _thread
+import multiprocessing
+import signal
+import threading
+import time
+from multiprocessing.connection import Connection
+
+from competitive_sudoku.sudoku import GameState
+from competitive_sudoku.sudokuai import BudgetExhausted, SudokuAI, StopComputation
+
+
+def _serve(player: SudokuAI, connection: Connection, game_state: GameState, stop_event) -> None:
+    """
+    The main loop of a worker process. Every iteration computes a move in game_state, reports that the computation
+    has ended and waits for the next delta (moves, scores, calculation_time, deadline). The loop ends when None is
+    received.
+    """
+    turn = 0
+    stopped_turn = -1
+    computing = False
+
+    def interrupt_when_set(watched_turn):
+        nonlocal stopped_turn
+        stop_event.wait()
+        stopped_turn = watched_turn
+        _thread.interrupt_main(signal.SIGINT)
+
+    # N.B. The handler runs in between arbitrary statements of the main thread, so it must not take any locks. The
+    # interrupt of a previous turn may arrive late, which is why the turns are compared.
+    def stop_handler(signum, frame):
+        nonlocal computing
+        if not computing or stopped_turn != turn:
+            return
+        # The methods of the base class may hold the lock that is shared with the referee, and the methods of the game
+        # state and the taboo moves must not be left halfway, so they are not interrupted
+        while frame is not None:
+            if frame.f_globals.get('__name__') in ('competitive_sudoku.sudokuai', 'competitive_sudoku.sudoku'):
+                threading.Timer(0.001, _thread.interrupt_main, (signal.SIGINT,)).start()
+                return
+            frame = frame.f_back
+        computing = False
+        raise StopComputation()
+
+    signal.signal(signal.SIGINT, stop_handler)
+    while True:
+        turn += 1
+        computing = True
+        threading.Thread(target=interrupt_when_set, args=(turn,), daemon=True).start()
+        taboo_moves = list(game_state.taboo_moves)
+        try:
+            try:
+                player.start_search()
+                player.compute_best_move(game_state)
+            finally:
+                computing = False
+                player.declare_done()
+        except (StopComputation, BudgetExhausted):
+            pass
+        except Exception as err:
+            print('Error: an exception occurred.\n', err)
+        game_state.taboo_moves[:] = taboo_moves
+        connection.send('done')
+
+        try:
+            delta = connection.recv()
+        except EOFError:
+            return
+        if delta is None:
+            return
+        moves, scores, player.calculation_time, player.deadline = delta
+        for move in moves:
+            game_state.apply(move)
+        game_state.scores = scores
+
+
+class PlayerWorker(object):
+    """
+    Computes the moves of a player in a persistent process. If the player does not respond to the stop event in time,
+    the process is terminated, and a new one is started with the full game state in the next turn.
+    """
+
+    def __init__(self, player: SudokuAI, grace_time: float = 0.5):
+        """
+        @param player: The AI of the player. Its best_move must be shared memory (see competitive_sudoku.move_slot) that
+        is set before the first move is computed.
+        @param grace_time: The time in seconds that the player gets to stop after the stop event has been set.
+        """
+        self.player = player
+        self.grace_time = grace_time
+        self.stop_event = multiprocessing.Event()
+        self.process = None
+        self.connection = None
+        self.synced_moves = 0
+
+    def _start(self, game_state: GameState) -> None:
+        self.player.stop_event = self.stop_event
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_serve, args=(self.player, child_connection, game_state, self.stop_event), daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def compute_best_move(self, game_state: GameState, calculation_time: float) -> None:
+        """
+        Lets the player compute a move in game_state during calculation_time seconds. Afterwards the move is available
+        in player.best_move.
+        @param game_state: The current state of the game.
+        @param calculation_time: The amount of time in seconds for computing the best move. If player.done_event is
+        not None, the computation ends as soon as the player has declared that it is done.
+        """
+        self.stop_event.clear()
+        if self.player.done_event is not None:
+            self.player.done_event.clear()
+        if self.process is None or not self.process.is_alive():
+            self._start(game_state)
+        else:
+            self.connection.send((game_state.moves[self.synced_moves:],
+                                  list(game_state.scores),
+                                  self.player.calculation_time,
+                                  self.player.deadline))
+        self.synced_moves = len(game_state.moves)
+
+        if self.player.done_event is not None:
+            self.player.done_event.wait(calculation_time)
+        else:
+            time.sleep(calculation_time)
+        self.stop_event.set()
+
+        if not self.connection.poll(self.grace_time):
+            print('The player did not stop in time, its worker process is restarted.')
+            self.terminate()
+        else:
+            self.connection.recv()
+
+    def terminate(self) -> None:
+        if self.process is not None:
+            if self.player.lock:
+                self.player.lock.acquire()
+            self.process.terminate()
+            if self.player.lock:
+                self.player.lock.release()
+            self.process.join()
+            self.connection.close()
+            self.process = None
+
+    def close(self) -> None:
+        """
+        Stops the worker process.
+        """
+        if self.process is not None and self.process.is_alive():
+            try:
+                self.connection.send(None)
+            except OSError:
+                pass
+            self.process.join(self.grace_time)
+        self.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
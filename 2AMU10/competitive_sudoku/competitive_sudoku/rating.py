@@ -0,0 +1,127 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Elo ratings from game results. The ratings are the maximum likelihood estimates of a Bradley-Terry model, in which
+# a draw counts as half a win for both players, like in BayesElo. Every pair of players that met gets a number of
+# virtual draws as a prior, which keeps the ratings finite for players that won or lost all their games.
+
+import math
+from typing import Dict, List, Tuple
+
+ELO_PER_NEPER = 400 / math.log(10)
+
+
+def expected_score(elo_difference: float) -> float:
+    """
+    @param elo_difference: The rating of a player minus the rating of its opponent.
+    @return: The expected score of the player in a game, between 0 and 1.
+    """
+    return 1 / (1 + 10 ** (-elo_difference / 400))
+
+
+def elo_difference(score: float) -> float:
+    """
+    The inverse of expected_score.
+    @param score: The average score of a player, between 0 and 1.
+    @return: The corresponding rating difference. It is infinite for a score of 0 or 1.
+    """
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+class RatingTable(object):
+    """
+    Keeps the results of games between players, and computes their Elo ratings with confidence intervals. The
+    average rating of the players is 0.
+    """
+
+    def __init__(self, prior_draws: float = 2.0):
+        """
+        @param prior_draws: The number of virtual draws that is added for every pair of players that played a game.
+        """
+        self.prior_draws = prior_draws
+        self.players: List[str] = []
+        self.games: Dict[Tuple[str, str], int] = {}       # the number of games between two players
+        self.points: Dict[Tuple[str, str], float] = {}    # the points of the first player against the second one
+        self.strengths: Dict[str, float] = {}             # the estimated strength, i.e. 10^(rating / 400)
+
+    def add_player(self, player: str) -> None:
+        if player not in self.strengths:
+            self.players.append(player)
+            self.strengths[player] = 1.0
+
+    def add_result(self, first: str, second: str, first_points: float) -> None:
+        """
+        Adds the result of a game.
+        @param first: The first player.
+        @param second: The second player.
+        @param first_points: The points of the first player, i.e. 1, 0.5 or 0. The second player gets the rest.
+        """
+        self.add_player(first)
+        self.add_player(second)
+        for a, b, points in [(first, second, first_points), (second, first, 1 - first_points)]:
+            self.games[(a, b)] = self.games.get((a, b), 0) + 1
+            self.points[(a, b)] = self.points.get((a, b), 0.0) + points
+
+    def _opponents(self, player: str) -> List[Tuple[str, float, float]]:
+        """
+        @return: Triples (opponent, number of games, points of player) including the prior.
+        """
+        return [(b, n + self.prior_draws, self.points[(a, b)] + self.prior_draws / 2)
+                for (a, b), n in self.games.items() if a == player]
+
+    def _update(self, iterations: int = 1000, tolerance: float = 1e-9) -> None:
+        # The minorization-maximization algorithm of Hunter (2004). The previous estimates are the starting point, so
+        # after adding a few results only a few iterations are needed.
+        strengths = self.strengths
+        for _ in range(iterations):
+            change = 0.0
+            for player in self.players:
+                opponents = self._opponents(player)
+                if not opponents:
+                    continue
+                points = sum(p for _, _, p in opponents)
+                denominator = sum(n / (strengths[player] + strengths[b]) for b, n, _ in opponents)
+                strength = points / denominator
+                change = max(change, abs(math.log(strength / strengths[player])))
+                strengths[player] = strength
+            mean = sum(math.log(s) for s in strengths.values()) / len(strengths)
+            for player in self.players:
+                strengths[player] /= math.exp(mean)
+            if change < tolerance:
+                break
+
+    def ratings(self) -> List[Tuple[str, float, float, int, float]]:
+        """
+        Computes the ratings of all players.
+        @return: Tuples (player, rating, error, games, score) sorted by decreasing rating. The rating is within
+        +/- error of the true rating with 95% confidence (normal approximation). The score is the fraction of the
+        available points that the player got.
+        """
+        self._update()
+        result = []
+        for player in self.players:
+            information = 0.0
+            games = 0
+            points = 0.0
+            for b, n, _ in self._opponents(player):
+                p = self.strengths[player] / (self.strengths[player] + self.strengths[b])
+                information += n * p * (1 - p)
+                games += self.games[(player, b)]
+                points += self.points[(player, b)]
+            rating = ELO_PER_NEPER * math.log(self.strengths[player])
+            error = 1.96 * ELO_PER_NEPER / math.sqrt(information) if information > 0 else math.inf
+            result.append((player, rating, error, games, points / games if games else 0.0))
+        result.sort(key=lambda row: -row[1])
+        return result
+
+    def __str__(self):
+        width = max([len(player) for player in self.players] + [6])
+        lines = [f'{"Rank":>4} {"Player":<{width}} {"Elo":>6} {"+/-":>6} {"Games":>6} {"Score":>6}']
+        for rank, (player, rating, error, games, score) in enumerate(self.ratings(), 1):
+            lines.append(f'{rank:>4} {player:<{width}} {rating:>6.0f} {error:>6.0f} {games:>6} {100 * score:>5.1f}%')
+        return '\n'.join(lines)
@@ -0,0 +1,218 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# A sqlite database with the results of games. Every game is one row in the table games.
+#
+# A game can be stored under a key, which is a hash of everything that determines the game: the source code of both
+# players, the start position, the time control and the index of the game. A game whose key is already in the
+# database does not have to be played again, which makes it possible to resume an interrupted match, and to skip the
+# games of a match that was played before with the same versions of the players.
+
+import ast
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from competitive_sudoku.sudoku import Move, TabooMove
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    first TEXT NOT NULL,           -- the module name of the player that moved first
+    second TEXT NOT NULL,          -- the module name of the other player
+    board TEXT NOT NULL,           -- the file with the start position
+    time REAL NOT NULL,            -- the time in seconds for computing a move
+    game INTEGER NOT NULL,         -- the index of the game within its match or pairing
+    winner INTEGER NOT NULL,       -- 1 or 2, or 0 for a draw
+    score1 INTEGER NOT NULL,
+    score2 INTEGER NOT NULL,
+    moves TEXT NOT NULL,           -- JSON list of [i, j, value, taboo]
+    move_times TEXT NOT NULL,      -- JSON list of the time in seconds that was used for every move
+    played TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    key TEXT,                      -- see game_key, or NULL
+    first_hash TEXT,               -- the hash of the code of the first player, see simulate_game.player_hash, or NULL
+    second_hash TEXT               -- the hash of the code of the second player, or NULL
+)
+'''
+
+
+def encode_moves(moves: List[Move]) -> List[List]:
+    """
+    @param moves: The moves of a game, with the taboo moves as TabooMove objects.
+    @return: A list of [i, j, value, taboo] that can be converted to JSON.
+    """
+    return [[move.i, move.j, move.value, isinstance(move, TabooMove)] for move in moves]
+
+
+def decode_moves(moves: List[List]) -> List[Move]:
+    """
+    The inverse of encode_moves.
+    """
+    return [TabooMove(i, j, value) if taboo else Move(i, j, value) for i, j, value, taboo in moves]
+
+
+def hash_file(path: str) -> str:
+    """
+    @param path: The location of a file.
+    @return: The SHA-256 hash of the contents of the file.
+    """
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def hash_folder(path: str) -> str:
+    """
+    Computes a hash of the files in a folder, e.g. the source code and data files of a player module. Compiled python
+    files are ignored.
+    @param path: The location of the folder.
+    @return: The SHA-256 hash of the names and contents of all files in the folder and its subfolders.
+    """
+    digest = hashlib.sha256()
+    for root, folders, files in os.walk(path):
+        folders[:] = sorted(folder for folder in folders if folder != '__pycache__')
+        for name in sorted(files):
+            if name.endswith('.pyc'):
+                continue
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).replace(os.sep, '/').encode())
+            digest.update(b'\0')
+            digest.update(hash_file(file_path).encode())
+    return digest.hexdigest()
+
+
+def hash_paths(root: str, paths: Iterable[str]) -> str:
+    """
+    Computes a hash of a number of files and folders.
+    @param root: The folder relative to which the names of the paths are hashed.
+    @param paths: The locations of the files and folders.
+    @return: The SHA-256 hash of the names and hashes of the paths, in sorted order.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(os.path.relpath(path, root).replace(os.sep, '/').encode())
+        digest.update(b'\0')
+        digest.update((hash_folder(path) if os.path.isdir(path) else hash_file(path)).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def imported_modules(path: str) -> Set[str]:
+    """
+    Finds the top level modules that the python files in a folder import, e.g. 'team43_A2' for the statement
+    'from team43_A2.region import Region'. Relative imports and files that cannot be parsed are ignored.
+    @param path: The location of the folder.
+    @return: The names of the modules.
+    """
+    modules = set()
+    for root, folders, files in os.walk(path):
+        folders[:] = [folder for folder in folders if folder != '__pycache__']
+        for name in files:
+            if not name.endswith('.py'):
+                continue
+            try:
+                with open(os.path.join(root, name), 'rb') as file:
+                    tree = ast.parse(file.read())
+            except (SyntaxError, ValueError):
+                continue
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    modules.update(alias.name.split('.')[0] for alias in node.names)
+                elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                    modules.add(node.module.split('.')[0])
+    return modules
+
+
+def game_key(first_hash: str, second_hash: str, board_hash: str, calculation_time: float, game: int, early_finish: bool = False) -> str:
+    """
+    @param first_hash: The hash of the code of the first player, see simulate_game.player_hash.
+    @param second_hash: The hash of the code of the second player.
+    @param board_hash: The hash_file of the start position.
+    @param calculation_time: The time in seconds for computing a move.
+    @param game: The index of the game.
+    @param early_finish: Whether the game is played in early finish mode.
+    @return: The key under which the game is stored.
+    """
+    text = f'{first_hash} {second_hash} {board_hash} {calculation_time!r} {game} {int(early_finish)}'
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResultsDatabase(object):
+    """
+    Stores game results in a sqlite database.
+    """
+
+    def __init__(self, path: str):
+        """
+        @param path: The location of the database file. It is created if it does not exist.
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(SCHEMA)
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info(games)')]
+        for column in ['key', 'first_hash', 'second_hash']:
+            if column not in columns:
+                self.connection.execute(f'ALTER TABLE games ADD COLUMN {column} TEXT')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS games_key ON games (key)')
+        self.connection.commit()
+
+    def add_game(self, first: str, second: str, board: str, calculation_time: float, game: int, result, key: Optional[str] = None, first_hash: Optional[str] = None, second_hash: Optional[str] = None) -> None:
+        """
+        Stores the result of a game.
+        @param first: The module name of the first player.
+        @param second: The module name of the second player.
+        @param board: The file with the start position.
+        @param calculation_time: The time in seconds for computing a move.
+        @param game: The index of the game.
+        @param result: The GameResult that was returned by simulate_game.
+        @param key: The game_key of the game, or None if the game should not be found by find_game.
+        @param first_hash: The hash of the code of the first player, or None.
+        @param second_hash: The hash of the code of the second player, or None.
+        """
+        moves = encode_moves(result.moves)
+        self.connection.execute(
+            'INSERT INTO games (first, second, board, time, game, winner, score1, score2, moves, move_times, key, first_hash, second_hash) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (first, second, board, calculation_time, game, result.winner, result.scores[0], result.scores[1],
+             json.dumps(moves), json.dumps([round(t, 4) for t in result.move_times]), key, first_hash, second_hash))
+        self.connection.commit()
+
+    def find_game(self, key: str) -> Optional[Tuple[int, List[int], List[Move], List[float]]]:
+        """
+        Looks up a game that was stored before.
+        @param key: The game_key of the game.
+        @return: A tuple (winner, scores, moves, move_times) with the taboo moves as TabooMove objects, or None if
+        there is no game with the given key.
+        """
+        row = self.connection.execute('SELECT winner, score1, score2, moves, move_times FROM games WHERE key = ? LIMIT 1', (key,)).fetchone()
+        if row is None:
+            return None
+        winner, score1, score2, moves, move_times = row
+        return winner, [score1, score2], decode_moves(json.loads(moves)), json.loads(move_times)
+
+    def results(self, players: List[str], hashes: Optional[Dict[str, str]] = None) -> Iterator[Tuple[str, str, float]]:
+        """
+        @param players: A list of module names.
+        @param hashes: A mapping from the module names to the hashes of the code of the players, or None. If it is
+        given, only the games that were played by these versions of the players are included. Games that were stored
+        without the hashes of the players are then left out as well.
+        @return: Triples (first, second, points of first) of the stored games between the given players.
+        """
+        query = 'SELECT first, second, winner, first_hash, second_hash FROM games'
+        for first, second, winner, first_hash, second_hash in self.connection.execute(query):
+            if first not in players or second not in players:
+                continue
+            if hashes is not None and (first_hash != hashes[first] or second_hash != hashes[second]):
+                continue
+            yield first, second, {0: 0.5, 1: 1.0, 2: 0.0}[winner]
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,140 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# A pure python replacement of the solve_sudoku program, with the same command line and output format.
+
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from competitive_sudoku.oracle import MoveResult, check_move, move_score, solve
+from competitive_sudoku.sudoku import BitmaskSudokuBoard, Move, SudokuBoard, load_sudoku_from_text
+
+
+def parse_taboo_moves(text: str) -> List[Move]:
+    """
+    Parses the argument of the --taboo option.
+    @param text: A space separated list of integers i j value i j value ...
+    @return: The corresponding list of moves.
+    """
+    numbers = [int(word) for word in text.split()]
+    if len(numbers) % 3 != 0:
+        raise RuntimeError(f"Could not parse taboo moves from '{text}'")
+    return [Move(numbers[k], numbers[k + 1], numbers[k + 2]) for k in range(0, len(numbers), 3)]
+
+
+def candidate_moves(board: SudokuBoard, taboo_moves: List[Move]) -> List[Move]:
+    """
+    Computes the moves that do not violate the constraints, and that are not taboo.
+    @param board: A sudoku board.
+    @param taboo_moves: A list of taboo moves.
+    @return: A list of moves.
+    """
+    if not isinstance(board, BitmaskSudokuBoard):
+        board = BitmaskSudokuBoard.from_board(board)
+    return board.legal_moves(taboo_moves)
+
+
+def generate_move(board: SudokuBoard, taboo_moves: List[Move], greedy: bool) -> Optional[Move]:
+    """
+    Generates a random or a greedy move, that keeps the sudoku solvable.
+    @param board: A sudoku board.
+    @param taboo_moves: A list of taboo moves.
+    @param greedy: If True, a move with the highest score is chosen.
+    @return: The generated move, or None if there is no such move.
+    """
+    moves = candidate_moves(board, taboo_moves)
+    random.shuffle(moves)
+    if greedy:
+        moves.sort(key=lambda move: -move_score(board, move.i, move.j))
+    for move in moves:
+        if check_move(board, move).status == MoveResult.SCORED:
+            return move
+    return None
+
+
+def move_output(board: SudokuBoard, text: str) -> str:
+    """
+    Computes the output of the --move option.
+    @param board: A sudoku board.
+    @param text: The argument of the --move option, i.e. an index k in the board array and a value.
+    @return: The generated output.
+    """
+    words = text.split()
+    if len(words) != 2 or not all(word.lstrip('-').isdigit() for word in words):
+        return f"Could not parse a move from '{text}'"
+    k, value = int(words[0]), int(words[1])
+    if not 0 <= k < board.N * board.N:
+        return f"Invalid move '{text}'."
+    i, j = board.f2rc(k)
+    result = check_move(board, Move(i, j, value))
+    if result.status == MoveResult.INVALID:
+        return f"Invalid move '{text}'."
+    if result.status == MoveResult.ILLEGAL:
+        return f"Illegal move '{text}'."
+    if result.status == MoveResult.NO_SOLUTION:
+        return f"The sudoku has no solution after move '{text}'."
+    return f'The score is {result.score}.\nThe sudoku has a solution.'
+
+
+def options_parser() -> argparse.ArgumentParser:
+    """
+    Creates a parser for the options of solve_sudoku, i.e. all command line arguments except the file name.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--move', help="Solve the sudoku after playing the given move. For example: 'solve_sudoku --move \"1 3\"'. Also a score for the move is computed.")
+    parser.add_argument('--print', help='Print the solution of the sudoku (if it exist)', action='store_true')
+    parser.add_argument('--random', help='Generate a random move, without violating the constraints.', action='store_true')
+    parser.add_argument('--greedy', help='Generate a greedy move.', action='store_true')
+    parser.add_argument('--taboo', help='An integer list that represents taboo moves.', default='')
+    return parser
+
+
+def solve_sudoku_output(board: SudokuBoard, args: argparse.Namespace) -> str:
+    """
+    Computes the output of solve_sudoku for a board.
+    @param board: A sudoku board.
+    @param args: The parsed options, see options_parser.
+    @return: The output of solve_sudoku.
+    """
+    if args.random or args.greedy:
+        move = generate_move(board, parse_taboo_moves(args.taboo), args.greedy)
+        if move is None:
+            return 'Error: could not find a greedy move.' if args.greedy else 'Error: could not find a legal move.'
+        return f'Generated move ({board.rc2f(move.i, move.j)},{move.value})'
+
+    if args.move is not None:
+        return move_output(board, args.move)
+
+    solution = solve(board)
+    if solution is None:
+        return 'The sudoku has no solution.'
+    output = 'The sudoku has a solution.'
+    if args.print:
+        result = SudokuBoard(board.m, board.n)
+        result.squares = solution
+        output += '\n' + str(result).rstrip()
+    return output
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    cmdline_parser = argparse.ArgumentParser(description='Solve a sudoku with rectangular regions.', parents=[options_parser()])
+    cmdline_parser.add_argument('file', help='A text file containing a sudoku.')
+    args = cmdline_parser.parse_args(argv)
+
+    try:
+        board = load_sudoku_from_text(Path(args.file).read_text())
+    except (OSError, RuntimeError, ValueError):
+        print(f'Could not load file {args.file}')
+        return 1
+
+    output = solve_sudoku_output(board, args)
+    print(output)
+    return 1 if output.startswith('Error') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# A sequential probability ratio test (SPRT) for matches between two players. It tests the hypothesis H0 that the
+# rating difference between the players is elo0 against the hypothesis H1 that it is elo1, and stops as soon as the
+# games played so far are sufficient to accept one of them. The log-likelihood ratio is computed with the normal
+# approximation of the generalized SPRT for wins, draws and losses that is also used by Fishtest.
+
+import math
+from typing import Optional
+
+from competitive_sudoku.rating import expected_score
+
+
+class SPRT(object):
+    """
+    Keeps the results of a match, and decides when the match can be stopped.
+    """
+
+    def __init__(self, elo0: float = 0.0, elo1: float = 50.0, alpha: float = 0.05, beta: float = 0.05):
+        """
+        @param elo0: The rating difference under H0.
+        @param elo1: The rating difference under H1. It should be larger than elo0.
+        @param alpha: The probability of accepting H1 while H0 is true (false positive).
+        @param beta: The probability of accepting H0 while H1 is true (false negative).
+        """
+        if elo1 <= elo0:
+            raise ValueError(f'elo1 ({elo1}) should be larger than elo0 ({elo0})')
+        if not (0 < alpha < 1 and 0 < beta < 1):
+            raise ValueError('alpha and beta should be between 0 and 1')
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.alpha = alpha
+        self.beta = beta
+        self.lower_bound = math.log(beta / (1 - alpha))
+        self.upper_bound = math.log((1 - beta) / alpha)
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+
+    def add_result(self, points: float) -> None:
+        """
+        Adds the result of a game.
+        @param points: The points of the player, i.e. 1, 0.5 or 0.
+        """
+        if points == 1:
+            self.wins += 1
+        elif points == 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    def llr(self) -> float:
+        """
+        @return: The log-likelihood ratio of H1 against H0 of the results so far.
+        """
+        n = self.games()
+        if n == 0:
+            return 0.0
+        score = (self.wins + 0.5 * self.draws) / n
+        variance = (self.wins * (1 - score) ** 2 + self.draws * (0.5 - score) ** 2 + self.losses * score ** 2) / n
+        if variance == 0:
+            # all games had the same result; fall back to the largest possible variance of a game, which is that of
+            # a coin flip between a win and a loss
+            variance = 0.25
+        score0 = expected_score(self.elo0)
+        score1 = expected_score(self.elo1)
+        return n * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+
+    def status(self) -> Optional[str]:
+        """
+        @return: 'H0' or 'H1' if that hypothesis is accepted, or None if more games are needed.
+        """
+        llr = self.llr()
+        if llr >= self.upper_bound:
+            return 'H1'
+        if llr <= self.lower_bound:
+            return 'H0'
+        return None
+
+    def __str__(self):
+        return f'LLR {self.llr():.2f} [{self.lower_bound:.2f}, {self.upper_bound:.2f}] ' \
+               f'(elo0={self.elo0:g}, elo1={self.elo1:g}, alpha={self.alpha:g}, beta={self.beta:g}) ' \
+               f'W-D-L {self.wins}-{self.draws}-{self.losses}'
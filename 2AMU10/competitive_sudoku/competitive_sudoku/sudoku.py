@@ -2,13 +2,28 @@
 #  Software License, (See accompanying file LICENSE or copy at
 #  https://www.gnu.org/licenses/gpl-3.0.txt)
 
-from typing import List, Tuple, Union
+from typing import Iterable, List, Tuple, Union
 
+from competitive_sudoku.topology import topology
+
+
+def pack_move(i: int, j: int, value: int) -> int:
+    """
+    Packs the coordinates and the value of a move into one integer. It is unique for boards with N < 256.
+    @param i: A row value in the range [0, ..., N)
+    @param j: A column value in the range [0, ..., N)
+    @param value: A value in the range [1, ..., N]
+    @return: The integer (i << 16) | (j << 8) | value
+    """
+    return (i << 16) | (j << 8) | value
 
 
 class Move(object):
     """A Move is a tuple (i, j, value) that represents the action board.put(i, j, value) for a given
-    sudoku configuration board."""
+    sudoku configuration board. Moves are hashable, and a Move and a TabooMove with the same coordinates and value
+    are equal. A move must not be modified after it has been added to a set or a dictionary."""
+
+    __slots__ = ('i', 'j', 'value')
 
     def __init__(self, i: int, j: int, value: int):
         """
@@ -25,7 +40,15 @@ class Move(object):
         return f'({self.i},{self.j}) -> {self.value}'
 
     def __eq__(self, other):
-        return (self.i, self.j, self.value) == (other.i, other.j, other.value)
+        if not isinstance(other, Move):
+            return NotImplemented
+        return self.i == other.i and self.j == other.j and self.value == other.value
+
+    def __hash__(self):
+        return (self.i << 16) | (self.j << 8) | self.value
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.i}, {self.j}, {self.value})'
 
 
 class TabooMove(Move):
@@ -39,10 +62,102 @@ class TabooMove(Move):
     @param j: A column value in the range [0, ..., N)
     @param value: A value in the range [1, ..., N]
     """
+    __slots__ = ()
+
     def __init__(self, i: int, j: int, value: int):
         super().__init__(i, j, value)
 
 
+class TabooMoves(list):
+    """
+    A list of taboo moves that also counts how often every packed move occurs in it, such that membership tests take
+    constant time. It can be used in the same way as a list. Appending and popping the last move take constant time as
+    well, so a search can add a taboo move before exploring a line and pop it afterwards instead of copying the list.
+    """
+
+    def __init__(self, moves: Iterable[TabooMove] = ()):
+        super().__init__(moves)
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self._counts = {}
+        for move in self:
+            self._add(move)
+
+    def _add(self, move: TabooMove) -> None:
+        key = pack_move(move.i, move.j, move.value)
+        self._counts[key] = self._counts.get(key, 0) + 1
+
+    def _discard(self, move: TabooMove) -> None:
+        key = pack_move(move.i, move.j, move.value)
+        count = self._counts[key] - 1
+        if count:
+            self._counts[key] = count
+        else:
+            del self._counts[key]
+
+    def contains(self, i: int, j: int, value: int) -> bool:
+        """
+        Tells if the move (i, j, value) is a taboo move, without creating a Move object.
+        """
+        return pack_move(i, j, value) in self._counts
+
+    def __contains__(self, move) -> bool:
+        if not isinstance(move, Move):
+            return False
+        return pack_move(move.i, move.j, move.value) in self._counts
+
+    def append(self, move: TabooMove) -> None:
+        super().append(move)
+        self._add(move)
+
+    def extend(self, moves: Iterable[TabooMove]) -> None:
+        for move in moves:
+            self.append(move)
+
+    def insert(self, index: int, move: TabooMove) -> None:
+        super().insert(index, move)
+        self._add(move)
+
+    def __iadd__(self, moves: Iterable[TabooMove]):
+        self.extend(moves)
+        return self
+
+    def __add__(self, moves: Iterable[TabooMove]) -> 'TabooMoves':
+        result = TabooMoves(self)
+        result.extend(moves)
+        return result
+
+    def remove(self, move: TabooMove) -> None:
+        super().remove(move)
+        self._discard(move)
+
+    def pop(self, index: int = -1) -> TabooMove:
+        move = super().pop(index)
+        self._discard(move)
+        return move
+
+    def clear(self) -> None:
+        super().clear()
+        self._counts.clear()
+
+    # Assigning or deleting slices is rare, so the counts are simply recomputed
+    def __setitem__(self, index, value) -> None:
+        super().__setitem__(index, value)
+        self._rebuild()
+
+    def __delitem__(self, index) -> None:
+        super().__delitem__(index)
+        self._rebuild()
+
+    def copy(self) -> 'TabooMoves':
+        return TabooMoves(self)
+
+    # copy.copy, copy.deepcopy and pickle use this, such that a copy gets its own counts
+    def __reduce__(self):
+        return TabooMoves, (list(self),)
+
+
 class SudokuBoard(object):
     """
     A simple board class for Sudoku. It supports arbitrary rectangular regions.
@@ -103,6 +218,19 @@ class SudokuBoard(object):
         k = self.rc2f(i, j)
         return self.squares[k]
 
+    def add_taboo_move(self, move: TabooMove) -> None:
+        """
+        Is called when a move becomes taboo. It does nothing, but subclasses can use it to include the taboo moves in
+        their state, see ZobristSudokuBoard.
+        @param move: A taboo move.
+        """
+
+    def remove_taboo_move(self, move: TabooMove) -> None:
+        """
+        Is called when a taboo move is taken back, see add_taboo_move.
+        @param move: A taboo move.
+        """
+
     def region_width(self):
         """
         Gets the number of columns in a region.
@@ -157,6 +285,147 @@ class SudokuBoard(object):
         return out.getvalue()
 
 
+class BitmaskSudokuBoard(SudokuBoard):
+    """
+    A sudoku board that keeps for every row, column and region a bitmask of the values that it contains, such that
+    the legality of a move can be determined without scanning the board. Value v corresponds to the bit 1 << (v - 1).
+    The masks are updated by put(); after writing to the squares array directly, rebuild() must be called. The masks
+    assume that no value occurs twice in a row, column or region.
+    """
+
+    def __init__(self, m: int = 3, n: int = 3):
+        """
+        Constructs an empty Sudoku with regions of size m x n.
+        @param m: The number of rows in a region.
+        @param n: The number of columns in a region.
+        """
+        super().__init__(m, n)
+        N = self.N
+        self.full = (1 << N) - 1   # The mask that contains all values
+        self.rows = [0] * N        # The values in the rows
+        self.cols = [0] * N        # The values in the columns
+        self.boxes = [0] * N       # The values in the regions, see region_index
+
+    @classmethod
+    def from_board(cls, board: SudokuBoard) -> 'BitmaskSudokuBoard':
+        """
+        Creates a bitmask board with the same squares as the given board.
+        @param board: A sudoku board.
+        @return: The generated board.
+        """
+        result = cls(board.m, board.n)
+        result.squares = list(board.squares)
+        result.rebuild()
+        return result
+
+    def rebuild(self) -> None:
+        """
+        Recomputes the masks from the squares.
+        """
+        N = self.N
+        tables = topology(self.m, self.n)
+        self.rows = [0] * N
+        self.cols = [0] * N
+        self.boxes = [0] * N
+        for k, value in enumerate(self.squares):
+            if value != SudokuBoard.empty:
+                bit = 1 << (value - 1)
+                self.rows[tables.row_of[k]] |= bit
+                self.cols[tables.col_of[k]] |= bit
+                self.boxes[tables.box_of[k]] |= bit
+
+    def region_index(self, i: int, j: int) -> int:
+        """
+        Gets the index of the region that contains the square (i, j). Regions are numbered row by row.
+        @param i: A row value in the range [0, ..., N)
+        @param j: A column value in the range [0, ..., N)
+        @return: A value in the range [0, ..., N)
+        """
+        return (i // self.m) * self.m + j // self.n
+
+    def put(self, i: int, j: int, value: int) -> None:
+        """
+        Puts the given value on the square with coordinates (i, j). The value SudokuBoard.empty clears the square.
+        @param i: A row value in the range [0, ..., N)
+        @param j: A column value in the range [0, ..., N)
+        @param value: A value in the range [1, ..., N], or SudokuBoard.empty
+        """
+        k = self.N * i + j
+        b = self.region_index(i, j)
+        old = self.squares[k]
+        if old != SudokuBoard.empty:
+            mask = ~(1 << (old - 1))
+            self.rows[i] &= mask
+            self.cols[j] &= mask
+            self.boxes[b] &= mask
+        self.squares[k] = value
+        if value != SudokuBoard.empty:
+            bit = 1 << (value - 1)
+            self.rows[i] |= bit
+            self.cols[j] |= bit
+            self.boxes[b] |= bit
+
+    def candidates(self, i: int, j: int) -> int:
+        """
+        Gets the values that can be put on the square (i, j) without violating a constraint.
+        @param i: A row value in the range [0, ..., N)
+        @param j: A column value in the range [0, ..., N)
+        @return: A mask that contains the bit 1 << (v - 1) for every such value v. It is 0 if the square is not empty.
+        """
+        if self.squares[self.N * i + j] != SudokuBoard.empty:
+            return 0
+        return self.full & ~(self.rows[i] | self.cols[j] | self.boxes[self.region_index(i, j)])
+
+    def candidate_values(self, i: int, j: int) -> List[int]:
+        """
+        Gets the values that can be put on the square (i, j) without violating a constraint.
+        @param i: A row value in the range [0, ..., N)
+        @param j: A column value in the range [0, ..., N)
+        @return: The values in increasing order.
+        """
+        mask = self.candidates(i, j)
+        values = []
+        while mask:
+            bit = mask & -mask
+            values.append(bit.bit_length())
+            mask ^= bit
+        return values
+
+    def is_legal(self, i: int, j: int, value: int) -> bool:
+        """
+        Determines if the value can be put on the square (i, j) without violating a constraint. It does not check
+        whether the sudoku remains solvable.
+        @param i: A row value in the range [0, ..., N)
+        @param j: A column value in the range [0, ..., N)
+        @param value: A value
+        @return: True if the square is empty and value is in the range [1, ..., N] and does not occur in the row, the
+        column and the region of the square.
+        """
+        return 1 <= value <= self.N and (self.candidates(i, j) >> (value - 1)) & 1 == 1
+
+    def legal_moves(self, taboo_moves: Iterable[TabooMove] = ()) -> List[Move]:
+        """
+        Computes the moves that do not violate a constraint, and that are not taboo.
+        @param taboo_moves: The taboo moves.
+        @return: The moves ordered by row, column and value.
+        """
+        taboo = taboo_moves if isinstance(taboo_moves, TabooMoves) else TabooMoves(taboo_moves)
+        tables = topology(self.m, self.n)
+        moves = []
+        for k, square in enumerate(self.squares):
+            if square != SudokuBoard.empty:
+                continue
+            i, j = tables.coordinates[k]
+            mask = self.full & ~(self.rows[i] | self.cols[j] | self.boxes[tables.box_of[k]])
+            while mask:
+                bit = mask & -mask
+                value = bit.bit_length()
+                if not taboo.contains(i, j, value):
+                    moves.append(Move(i, j, value))
+                mask ^= bit
+        return moves
+
+
 # written by Gennaro Gala
 def print_board(board: SudokuBoard) -> str:
     import io
@@ -281,16 +550,50 @@ class GameState(object):
         """
         @param initial_board: A sudoku board. It contains the start position of a game.
         @param board: A sudoku board. It contains the current position of a game.
-        @param taboo_moves: A list of taboo moves. Moves in this list cannot be played.
+        @param taboo_moves: A list of taboo moves. Moves in this list cannot be played. It is stored as a TabooMoves
+        object, which has constant time membership tests.
         @param moves: The history of a sudoku game, starting in initial_board. The
         history includes taboo moves.
         @param scores: The current scores of the first and the second player.
         """
         self.initial_board = initial_board
         self.board = board
-        self.taboo_moves = taboo_moves
+        self.taboo_moves = taboo_moves if isinstance(taboo_moves, TabooMoves) else TabooMoves(taboo_moves)
         self.moves = moves
         self.scores = scores
+        self.trail: List[Tuple[Move, int, int]] = []  # The move, the index of its player and its score, see apply
+
+    def apply(self, move: Move, score: int = 0) -> None:
+        """
+        Plays a move of the current player. A Move is put on the board, and a TabooMove is added to the taboo moves.
+        The move is recorded, such that it can be taken back with undo().
+        @param move: A move. It is not checked whether the move is allowed.
+        @param score: The score of the move, which is added to the score of the current player.
+        """
+        player = len(self.moves) % 2
+        if isinstance(move, TabooMove):
+            self.taboo_moves.append(move)
+            self.board.add_taboo_move(move)
+        else:
+            self.board.put(move.i, move.j, move.value)
+        self.moves.append(move)
+        self.scores[player] += score
+        self.trail.append((move, player, score))
+
+    def undo(self) -> Move:
+        """
+        Takes back the last move that was played with apply().
+        @return: The move that was taken back.
+        """
+        move, player, score = self.trail.pop()
+        self.scores[player] -= score
+        self.moves.pop()
+        if isinstance(move, TabooMove):
+            self.taboo_moves.pop()
+            self.board.remove_taboo_move(move)
+        else:
+            self.board.put(move.i, move.j, SudokuBoard.empty)
+        return move
 
     def current_player(self):
         """Gives the index of the current player (1 or 2). The convention is that player 1
@@ -2,14 +2,54 @@
 #  Software License, (See accompanying file LICENSE or copy at
 #  https://www.gnu.org/licenses/gpl-3.0.txt)
 
-from typing import List
+from typing import List, Optional
+from competitive_sudoku.move_slot import BestMoveSlot
 from competitive_sudoku.sudoku import GameState, Move
 import os
 import pickle
 import math
+import random
+import time
 from datetime import datetime
 
 
+class StopComputation(Exception):
+    """
+    Raised by propose_move when the computation of a move has been stopped by the game playing framework.
+    """
+    pass
+
+
+class BudgetExhausted(Exception):
+    """
+    Raised by count_node and count_iteration when the search budget for the current move has been used up. The
+    framework catches it, so an AI does not need to handle it: the last proposed move is played.
+    """
+    pass
+
+
+class SearchBudget(object):
+    """
+    A fixed amount of search for computing a move, as an alternative to a time limit. With a budget and a seed, a given
+    position always leads to the same move, independent of the speed and the load of the machine.
+    """
+
+    def __init__(self, nodes: Optional[int] = None, iterations: Optional[int] = None, depth: Optional[int] = None):
+        """
+        @param nodes: The maximum number of nodes that are searched, or None for no limit.
+        @param iterations: The maximum number of iterations, e.g. of iterative deepening or of MCTS, or None for no
+        limit.
+        @param depth: The maximum search depth, or None for no limit.
+        """
+        self.nodes = nodes
+        self.iterations = iterations
+        self.depth = depth
+
+    def __str__(self):
+        limits = [f'{name}={value}' for name, value in [('nodes', self.nodes), ('iterations', self.iterations), ('depth', self.depth)] if value is not None]
+        return ', '.join(limits) if limits else 'unlimited'
+
+
 class SudokuAI(object):
     """
     Sudoku AI that computes the best move in a given sudoku configuration.
@@ -19,6 +59,15 @@ class SudokuAI(object):
         self.best_move: List[int] = [0, 0, 0]
         self.lock = None
         self.player_number = -1
+        self.stop_event = None  # if it is set, the framework has stopped the computation of the current move
+        self.done_event = None  # if it is set, the AI has declared that it is done with the current move
+        self.budget: Optional[SearchBudget] = None  # if it is set, the search for a move is limited by this budget
+        self.seed: Optional[int] = None  # if it is set, the random generators are reset with this seed for every move
+        self.random = random.Random()
+        self.nodes = 0
+        self.iterations = 0
+        self.calculation_time: Optional[float] = None  # the time in seconds for computing the current move
+        self.deadline: Optional[float] = None  # the value of time.monotonic() at which the current move ends
 
     def compute_best_move(self, game_state: GameState) -> None:
         """
@@ -27,6 +76,11 @@ class SudokuAI(object):
         propose_move. This function is run by a game playing framework in a
         separate thread, that will be killed after a specific amount of time.
         The last reported move is the one that will be played.
+        If the framework keeps the AI alive between moves, the computation is
+        stopped by raising StopComputation inside it instead. Data that is
+        stored in self is then preserved for the next move.
+        The framework sets self.calculation_time and self.deadline before
+        calling this function, see time_left and should_stop.
         @param game_state: A Game state.
         """
         raise NotImplementedError
@@ -38,6 +92,11 @@ class SudokuAI(object):
         @param move: A move.
         """
         i, j, value = move.i, move.j, move.value
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise StopComputation()
+        if isinstance(self.best_move, BestMoveSlot):
+            self.best_move.store(i, j, value)
+            return
         if self.lock:
             self.lock.acquire()
         self.best_move[0] = i
@@ -46,6 +105,68 @@ class SudokuAI(object):
         if self.lock:
             self.lock.release()
 
+    def start_search(self) -> None:
+        """
+        Resets the search counters and the random generators. It is called by the framework right before
+        compute_best_move. Both self.random and the random module are seeded, since the latter is also used by the
+        helper classes of an AI.
+        """
+        self.nodes = 0
+        self.iterations = 0
+        if self.seed is not None:
+            self.random.seed(self.seed)
+            random.seed(self.seed)
+
+    def count_node(self) -> None:
+        """
+        Counts a node of the search. Raises BudgetExhausted if the node budget has been used up.
+        """
+        self.nodes += 1
+        if self.budget is not None and self.budget.nodes is not None and self.nodes > self.budget.nodes:
+            raise BudgetExhausted()
+
+    def count_iteration(self) -> None:
+        """
+        Counts the start of an iteration of the search. Raises BudgetExhausted if the iteration budget has been used
+        up.
+        """
+        if self.budget is not None and self.budget.iterations is not None and self.iterations >= self.budget.iterations:
+            raise BudgetExhausted()
+        self.iterations += 1
+
+    def time_left(self) -> float:
+        """
+        @return: The time in seconds until the deadline of the current move, or infinity if the framework did not
+        set a deadline.
+        """
+        if self.deadline is None:
+            return math.inf
+        return self.deadline - time.monotonic()
+
+    def should_stop(self) -> bool:
+        """
+        Tells if the deadline of the current move has passed. It is cheap enough to be called in every node of a
+        search, so that an AI can abandon an iteration that cannot be finished anymore.
+        @return: True if the computation of the current move should stop.
+        """
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def max_depth(self) -> Optional[int]:
+        """
+        @return: The maximum search depth of the budget, or None if there is no limit.
+        """
+        return self.budget.depth if self.budget is not None else None
+
+    def declare_done(self) -> None:
+        """
+        Tells the framework that no better move will be proposed for the
+        current position. If the framework runs in early finish mode, it then
+        continues with the game without waiting for the time to be up. Note
+        that returning from compute_best_move has the same effect.
+        """
+        if self.done_event is not None:
+            self.done_event.set()
+
     def save(self, object):
         if self.lock:
             self.lock.acquire()
@@ -0,0 +1,62 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# The structure of a sudoku board that only depends on the shape m x n of its regions: which squares belong to which
+# row, column and region, and which squares share a unit. The squares are numbered with the index k = N * i + j of the
+# board array, see SudokuBoard.rc2f. The tables are computed once per shape and per process, and shared by everyone
+# who asks for them, so they must not be modified.
+
+from functools import lru_cache
+from typing import Tuple
+
+
+class Topology(object):
+    """
+    The precomputed tables of a board with regions of size m x n. All tables are tuples.
+    """
+
+    def __init__(self, m: int, n: int):
+        """
+        @param m: The number of rows in a region.
+        @param n: The number of columns in a region.
+        """
+        N = m * n
+        self.m = m
+        self.n = n
+        self.N = N
+
+        # index[i][j] is the index k of the square (i, j), and coordinates[k] is the pair (i, j)
+        self.index: Tuple[Tuple[int, ...], ...] = tuple(tuple(N * i + j for j in range(N)) for i in range(N))
+        self.coordinates: Tuple[Tuple[int, int], ...] = tuple(divmod(k, N) for k in range(N * N))
+
+        # The row, column and region of every square. Regions are numbered row by row.
+        self.row_of: Tuple[int, ...] = tuple(k // N for k in range(N * N))
+        self.col_of: Tuple[int, ...] = tuple(k % N for k in range(N * N))
+        self.box_of: Tuple[int, ...] = tuple((k // N // m) * m + (k % N) // n for k in range(N * N))
+
+        # The squares of the N rows, followed by those of the N columns and the N regions, and for every square the
+        # indices of its three units in this tuple
+        units = [[] for _ in range(3 * N)]
+        for k in range(N * N):
+            units[self.row_of[k]].append(k)
+            units[N + self.col_of[k]].append(k)
+            units[2 * N + self.box_of[k]].append(k)
+        self.units: Tuple[Tuple[int, ...], ...] = tuple(tuple(unit) for unit in units)
+        self.units_of: Tuple[Tuple[int, int, int], ...] = \
+            tuple((self.row_of[k], N + self.col_of[k], 2 * N + self.box_of[k]) for k in range(N * N))
+
+        # The other squares that share a unit with a square, in increasing order
+        self.peers: Tuple[Tuple[int, ...], ...] = \
+            tuple(tuple(sorted(set(p for u in self.units_of[k] for p in self.units[u]) - {k})) for k in range(N * N))
+
+
+@lru_cache(maxsize=None)
+def topology(m: int, n: int) -> Topology:
+    """
+    Gets the tables of a board with regions of size m x n. They are computed the first time they are requested.
+    @param m: The number of rows in a region.
+    @param n: The number of columns in a region.
+    @return: The shared tables.
+    """
+    return Topology(m, n)
@@ -0,0 +1,119 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Zobrist hashing of sudoku positions. Every square (i, j) gets a random 64-bit key for every value in [0, ..., N],
+# where 0 stands for the empty square, and the key of a board is the XOR of the keys of the values of all its squares.
+# Taboo moves have keys of their own, which are XOR-ed into the key as well. Putting a value on a square changes the
+# key with two XOR operations.
+#
+# The tables are generated with a random generator that is seeded with the name of the table and the shape of the
+# board, so they are the same in every process and every run. This makes the keys suitable for tables that are shared
+# between the players and the referee, or stored on disk.
+
+import random
+from functools import lru_cache
+from typing import Iterable, Tuple
+
+from competitive_sudoku.sudoku import BitmaskSudokuBoard, SudokuBoard, TabooMove
+
+ZobristTable = Tuple[Tuple[Tuple[int, ...], ...], ...]
+
+
+@lru_cache(maxsize=None)
+def zobrist_table(m: int, n: int, name: str = 'squares') -> ZobristTable:
+    """
+    Gets a table of random 64-bit keys for boards with regions of size m x n.
+    @param m: The number of rows in a region.
+    @param n: The number of columns in a region.
+    @param name: The name of the table. Tables with different names are independent. The boards use the tables
+    'squares' and 'taboo'; other names can be used for other purposes.
+    @return: A table such that table[i][j][value] is the key of the value in [0, ..., N] on the square (i, j).
+    """
+    N = m * n
+    generator = random.Random(f'zobrist {name} {m}x{n}')
+    return tuple(tuple(tuple(generator.getrandbits(64) for _ in range(N + 1)) for _ in range(N)) for _ in range(N))
+
+
+class ZobristSudokuBoard(BitmaskSudokuBoard):
+    """
+    A bitmask sudoku board that also maintains its Zobrist key. The key is updated by put(), add_taboo_move() and
+    remove_taboo_move(). After writing to the squares array directly, rebuild() must be called.
+    """
+
+    def __init__(self, m: int = 3, n: int = 3):
+        """
+        Constructs an empty Sudoku with regions of size m x n.
+        @param m: The number of rows in a region.
+        @param n: The number of columns in a region.
+        """
+        super().__init__(m, n)
+        self.square_keys = zobrist_table(m, n)
+        self.taboo_keys = zobrist_table(m, n, 'taboo')
+        self.taboo_key = 0     # The XOR of the keys of the taboo moves
+        self.zobrist_key = 0
+        self.rebuild()
+
+    @classmethod
+    def from_board(cls, board: SudokuBoard, taboo_moves: Iterable[TabooMove] = ()) -> 'ZobristSudokuBoard':
+        """
+        Creates a Zobrist board with the same squares as the given board.
+        @param board: A sudoku board.
+        @param taboo_moves: The taboo moves that are included in the key.
+        @return: The generated board.
+        """
+        result = super().from_board(board)
+        for move in taboo_moves:
+            result.add_taboo_move(move)
+        return result
+
+    def rebuild(self) -> None:
+        """
+        Recomputes the masks and the key from the squares. The taboo moves are kept.
+        """
+        super().rebuild()
+        N = self.N
+        key = self.taboo_key
+        for k, value in enumerate(self.squares):
+            key ^= self.square_keys[k // N][k % N][value]
+        self.zobrist_key = key
+
+    def put(self, i: int, j: int, value: int) -> None:
+        """
+        Puts the given value on the square with coordinates (i, j). The value SudokuBoard.empty clears the square.
+        @param i: A row value in the range [0, ..., N)
+        @param j: A column value in the range [0, ..., N)
+        @param value: A value in the range [1, ..., N], or SudokuBoard.empty
+        """
+        keys = self.square_keys[i][j]
+        self.zobrist_key ^= keys[self.squares[self.N * i + j]] ^ keys[value]
+        super().put(i, j, value)
+
+    def add_taboo_move(self, move: TabooMove) -> None:
+        """
+        Includes a taboo move in the key.
+        @param move: A taboo move.
+        """
+        key = self.taboo_keys[move.i][move.j][move.value]
+        self.taboo_key ^= key
+        self.zobrist_key ^= key
+
+    def remove_taboo_move(self, move: TabooMove) -> None:
+        """
+        Removes a taboo move from the key. It must have been added before.
+        @param move: A taboo move.
+        """
+        # XOR is its own inverse
+        self.add_taboo_move(move)
+
+    # The tables are shared by all boards of the same shape, so they are not pickled
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['square_keys']
+        del state['taboo_keys']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.square_keys = zobrist_table(self.m, self.n)
+        self.taboo_keys = zobrist_table(self.m, self.n, 'taboo')
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import argparse
+import os
+import random
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+from competitive_sudoku.game_queue import JobRejected, run_worker
+from competitive_sudoku.results_db import encode_moves
+from play_match import play_game
+from simulate_game import player_folder, player_hash
+
+
+# Play the game of a job that was handed out by a GameBroker. A job is a dictionary with the fields first, second,
+# board (the name of the board file), board_text (its contents), time, game, seed, early_finish, and the hashes
+# first_hash and second_hash of the players, see player_hash. The game is only played if the code of the players on
+# this machine is the same as the code of the broker; otherwise, and if the game cannot be played, the job is
+# rejected, such that the broker hands it out to another worker.
+def play_job(job: Dict, output_dir: str) -> Dict:
+    for name, module_hash in [(job['first'], job['first_hash']), (job['second'], job['second_hash'])]:
+        if not os.path.isdir(player_folder(name)) or player_hash(name) != module_hash:
+            raise JobRejected(f'the code of {name} on this machine is different from the one of the broker')
+
+    name = f'{job["first"]}-{job["second"]}-game={job["game"]}-board={Path(job["board"]).stem}-time={job["time"]}'.replace('/', '.')
+    output_file = os.path.join(output_dir, name + '.txt')
+    random.seed(job['seed'])
+    try:
+        with tempfile.TemporaryDirectory(prefix='sudoku_board_') as folder:
+            board = os.path.join(folder, Path(job['board']).name)
+            Path(board).write_text(job['board_text'])
+            result = play_game(job['first'], job['second'], board, job['time'], output_file, job['early_finish'], True)
+    except Exception as err:
+        raise JobRejected(f'{type(err).__name__}: {err}')
+    return {'winner': result.winner, 'scores': result.scores, 'moves': encode_moves(result.moves), 'move_times': result.move_times}
+
+
+def main():
+    cmdline_parser = argparse.ArgumentParser(description='Play the games that are handed out by a game broker, see tournament.py --broker.')
+    cmdline_parser.add_argument('--broker', type=str, default='localhost:5500', help='The address of the broker as host:port (default: localhost:5500)')
+    cmdline_parser.add_argument('--output-dir', type=str, default='worker-games', help='The folder for the output of the games (default: worker-games)')
+    cmdline_parser.add_argument('--patience', type=float, default=30.0, help='The time in seconds after which the worker stops if the broker cannot be reached (default: 30)')
+    args = cmdline_parser.parse_args()
+
+    host, port = args.broker.rsplit(':', 1)
+    output_dir = os.path.abspath(args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    count = run_worker((host, int(port)), lambda job: play_job(job, output_dir), patience=args.patience)
+    print(f'Played {count} games')
+
+
+if __name__ == '__main__':
+    main()
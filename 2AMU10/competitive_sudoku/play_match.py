@@ -5,9 +5,18 @@
 #  https://www.gnu.org/licenses/gpl-3.0.txt)
 
 import argparse
+import concurrent.futures
+import contextlib
+import os
+import shutil
+import tempfile
 from pathlib import Path
-from typing import List, Sequence, Tuple
-from competitive_sudoku.execute import execute_command
+from typing import List, Optional, Sequence, Tuple
+from competitive_sudoku.game_record import GameRecorder
+from competitive_sudoku.results_db import ResultsDatabase, game_key, hash_file
+from competitive_sudoku.sprt import SPRT
+from competitive_sudoku.sudoku import load_sudoku_from_text
+from simulate_game import GameResult, default_solve_sudoku_path, load_player, player_hash, simulate_game
 
 
 # Prints 1 instead of 1.0
@@ -15,35 +24,76 @@ def print_score(x: float) -> str:
     return '0' if x == 0 else str(x).rstrip('0').rstrip('.')
 
 
-# Play a game between the two players, and return the result.
-def play_game(player: str, opponent: str, board: str, calculation_time: float, output_file: str) -> Tuple[float, float]:
-    cmd = f'python3 ./simulate_game.py --first={player} --second={opponent} --board={board} --time={calculation_time}'
-    output = execute_command(cmd)
-    Path(output_file).write_text(output)
-    if 'Player 1 wins the game.' in output:
-        return (1, 0)
-    elif 'The game ends in a draw.' in output:
-        return (0.5, 0.5)
-    elif 'Player 2 wins the game.' in output:
-        return (0, 1)
-    else:
-        print(output)
-        raise RuntimeError('Unknown game result')
-
-
-# Play a match between player and opponent.
-def play_match(player: str, opponent: str, count: int, board: str, calculation_time: float) -> None:
+# Play a game between the two players in this process, and return the result. The output of the referee is written
+# to output_file. The game is played in a fresh working directory, such that the files that players save during a
+# game cannot collide with those of other games. If record is True, the moves are also written to a JSON lines file
+# next to output_file.
+def play_game(player: str, opponent: str, board: str, calculation_time: float, output_file: str, early_finish: bool = False, quiet: bool = False, record: bool = False) -> GameResult:
+    initial_board = load_sudoku_from_text(Path(board).read_text())
+    output_path = Path(output_file).resolve()
+    record_path = output_path.with_suffix('.jsonl')
+    current_directory = os.getcwd()
+    working_directory = tempfile.mkdtemp(prefix='sudoku_game_')
+    try:
+        os.chdir(working_directory)
+        with open(output_path, 'w') as output, contextlib.redirect_stdout(output), contextlib.ExitStack() as stack:
+            recorder = stack.enter_context(GameRecorder(str(record_path))) if record else None
+            player1 = load_player(player, 1, default_solve_sudoku_path())
+            player2 = load_player(opponent, 2, default_solve_sudoku_path())
+            return simulate_game(initial_board, player1, player2, calculation_time=calculation_time, early_finish=early_finish, quiet=quiet, recorder=recorder)
+    finally:
+        os.chdir(current_directory)
+        shutil.rmtree(working_directory, ignore_errors=True)
+
+
+# Play a match between player and opponent. With jobs > 1 the games are played concurrently in a pool of processes.
+# If sprt is given, the match stops as soon as the test accepts one of its hypotheses, and count is the maximum number
+# of games. Games that are still running at that moment are finished, but not counted.
+# If database is given, every game is stored in it as soon as it is finished, under a key that consists of the hashes
+# of the source code of both players, the board, the time control and the index of the game. Games that are found in
+# the database are not played again, so an interrupted match resumes where it stopped.
+def play_match(player: str, opponent: str, count: int, board: str, calculation_time: float, early_finish: bool = False, jobs: int = 1, quiet: bool = False, record: bool = False, sprt: Optional[SPRT] = None, database: Optional[str] = None) -> None:
     player_score = 0.0
     opponent_score = 0.0
     result_lines = []
 
+    results = ResultsDatabase(database) if database else None
+    if results is not None:
+        hashes = {name: player_hash(name) for name in [player, opponent]}
+        board_hash = hash_file(board)
+
+    games = []
     for i in range(1, count+1):
-        print(f'Playing game {i}')
         player_starts = i % 2 == 1
         first = player if player_starts else opponent
         second = opponent if player_starts else player
         output_file = f'{player}-{opponent}-game={i}-board={Path(board).stem}-time={calculation_time}.txt'
-        result = play_game(first, second, board, calculation_time, output_file)
+        key = game_key(hashes[first], hashes[second], board_hash, calculation_time, i, early_finish) if results is not None else None
+        stored_game = results.find_game(key) if results is not None else None
+        cached_result = GameResult.from_moves(*stored_game) if stored_game is not None else None
+        games.append((i, player_starts, first, second, output_file, key, cached_result))
+
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    if executor is not None:
+        futures = {}
+        for i, _, first, second, output_file, _, cached_result in games:
+            if cached_result is None:
+                print(f'Playing game {i}')
+                futures[i] = executor.submit(play_game, first, second, board, calculation_time, output_file, early_finish, quiet, record)
+
+    for i, player_starts, first, second, output_file, key, cached_result in games:
+        if cached_result is not None:
+            print(f'Game {i} was played before')
+            game_result = cached_result
+        else:
+            if executor is not None:
+                game_result = futures[i].result()
+            else:
+                print(f'Playing game {i}')
+                game_result = play_game(first, second, board, calculation_time, output_file, early_finish, quiet, record)
+            if results is not None:
+                results.add_game(first, second, board, calculation_time, i, game_result, key, hashes[first], hashes[second])
+        result = game_result.points()
 
         result_line = f'{first} - {second} {print_score(result[0])}-{print_score(result[1])}\n'
         result_lines.append(result_line)
@@ -56,6 +106,28 @@ def play_match(player: str, opponent: str, count: int, board: str, calculation_t
             player_score += result[1]
             opponent_score += result[0]
 
+        if sprt is not None:
+            sprt.add_result(result[0] if player_starts else result[1])
+            print(sprt)
+            if sprt.status() is not None:
+                break
+
+    if executor is not None:
+        executor.shutdown(cancel_futures=True)
+    if results is not None:
+        results.close()
+
+    if sprt is not None:
+        status = sprt.status()
+        if status == 'H1':
+            result_line = f'SPRT: H1 (elo1={sprt.elo1:g}) accepted after {sprt.games()} games, {player} is stronger than {opponent}'
+        elif status == 'H0':
+            result_line = f'SPRT: H0 (elo0={sprt.elo0:g}) accepted after {sprt.games()} games, {player} is not stronger than {opponent}'
+        else:
+            result_line = f'SPRT: no decision after {sprt.games()} games'
+        result_lines.append(f'{sprt}\n{result_line}\n')
+        print(result_line)
+
     result_line = f'Match result: {player} - {opponent} {print_score(player_score)}-{print_score(opponent_score)}'
     result_lines.append(result_line)
     print(result_line)
@@ -71,9 +143,21 @@ def main():
     cmdline_parser.add_argument('--count', type=int, default=6, help='The number of games (default: 6)')
     cmdline_parser.add_argument('--board', type=str, default='boards/empty-2x2.txt', help='The text file containing the start position (default: boards/empty-2x2.txt)')
     cmdline_parser.add_argument('--time', type=float, default=3.0, help="The time (in seconds) for computing a move (default: 3.0)")
+    cmdline_parser.add_argument('--early-finish', action='store_true', help='Continue with the next move as soon as a player is done with its move')
+    cmdline_parser.add_argument('--jobs', type=int, default=1, help='The number of games that are played concurrently (default: 1)')
+    cmdline_parser.add_argument('--quiet', action='store_true', help='Do not write the board after every move to the game files')
+    cmdline_parser.add_argument('--record', action='store_true', help='Also write the moves of every game to a JSON lines file')
+    cmdline_parser.add_argument('--database', type=str, default='play_match.db', help='The sqlite database in which the games are stored, such that they are not played again (default: play_match.db)')
+    cmdline_parser.add_argument('--no-database', action='store_true', help='Play all games, and do not store them in the database')
+    cmdline_parser.add_argument('--sprt', action='store_true', help='Stop the match as soon as a sequential probability ratio test decides if the first player is stronger; --count is then the maximum number of games')
+    cmdline_parser.add_argument('--elo0', type=float, default=0.0, help='The Elo difference of the first player under the null hypothesis of the SPRT (default: 0)')
+    cmdline_parser.add_argument('--elo1', type=float, default=50.0, help='The Elo difference of the first player under the alternative hypothesis of the SPRT (default: 50)')
+    cmdline_parser.add_argument('--alpha', type=float, default=0.05, help='The probability that the SPRT wrongly accepts the alternative hypothesis (default: 0.05)')
+    cmdline_parser.add_argument('--beta', type=float, default=0.05, help='The probability that the SPRT wrongly accepts the null hypothesis (default: 0.05)')
     args = cmdline_parser.parse_args()
 
-    play_match(args.first, args.second, args.count, args.board, args.time)
+    sprt = SPRT(args.elo0, args.elo1, args.alpha, args.beta) if args.sprt else None
+    play_match(args.first, args.second, args.count, args.board, args.time, args.early_finish, args.jobs, args.quiet, args.record, sprt, None if args.no_database else args.database)
 
 
 if __name__ == '__main__':
@@ -5,17 +5,156 @@
 #  https://www.gnu.org/licenses/gpl-3.0.txt)
 
 import argparse
+import contextlib
 import importlib
 import multiprocessing
 import platform
-import re
 import time
 import os
+import sys
 from pathlib import Path
 
+from typing import List, Optional, Tuple
+
 from competitive_sudoku.execute import solve_sudoku
+from competitive_sudoku.game_record import GameRecorder
+from competitive_sudoku.move_slot import BestMoveSlot
+from competitive_sudoku.oracle import MoveResult, WitnessOracle, check_move, parse_move_output
+from competitive_sudoku.oracle_cache import OracleCache, move_key
+from competitive_sudoku.oracle_server import OraclePool, shared_pool
+from competitive_sudoku.player_worker import PlayerWorker
+from competitive_sudoku.results_db import hash_paths, imported_modules
 from competitive_sudoku.sudoku import GameState, SudokuBoard, Move, TabooMove, load_sudoku_from_text
-from competitive_sudoku.sudokuai import SudokuAI
+from competitive_sudoku.sudokuai import BudgetExhausted, SearchBudget, SudokuAI
+from competitive_sudoku.zobrist import ZobristSudokuBoard
+
+
+class GameResult(object):
+    """
+    The outcome of a game that was played by simulate_game.
+    """
+
+    def __init__(self, winner: int, game_state: GameState, move_times: List[float]):
+        """
+        @param winner: The number of the player that won the game, or 0 in case of a draw.
+        @param game_state: The final state of the game.
+        @param move_times: For every turn, the time in seconds that the player used for computing its move.
+        """
+        self.winner = winner
+        self.scores = list(game_state.scores)
+        self.moves = list(game_state.moves)
+        self.taboo_moves = list(game_state.taboo_moves)
+        self.move_times = move_times
+
+    @classmethod
+    def from_moves(cls, winner: int, scores: List[int], moves: List[Move], move_times: List[float]) -> 'GameResult':
+        """
+        Creates the result of a game that was played before, e.g. one that was stored in a results database.
+        @param winner: The number of the player that won the game, or 0 in case of a draw.
+        @param scores: The scores of player 1 and player 2.
+        @param moves: The moves of the game, with the taboo moves as TabooMove objects.
+        @param move_times: For every turn, the time in seconds that the player used for computing its move.
+        """
+        result = cls.__new__(cls)
+        result.winner = winner
+        result.scores = list(scores)
+        result.moves = list(moves)
+        result.taboo_moves = [move for move in moves if isinstance(move, TabooMove)]
+        result.move_times = list(move_times)
+        return result
+
+    def points(self) -> Tuple[float, float]:
+        """
+        @return: The match points of player 1 and player 2, i.e. 1 for a win and 0.5 for a draw.
+        """
+        if self.winner == 0:
+            return 0.5, 0.5
+        return (1, 0) if self.winner == 1 else (0, 1)
+
+
+def default_solve_sudoku_path() -> str:
+    """
+    @return: The location of the solve_sudoku executable. It is located relative to this script, such that games can
+    be played from any working directory.
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(root, 'bin', 'solve_sudoku.exe' if platform.system() == 'Windows' else 'solve_sudoku')
+
+
+def player_folder(module_name: str) -> str:
+    """
+    @param module_name: The name of a player module, as it is passed to load_player.
+    @return: The location of the folder of the module.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), *module_name.split('/'))
+
+
+def player_dependencies(module_name: str) -> List[str]:
+    """
+    Finds the code that determines how a player plays: the folder of its module, the folders of the other modules in
+    this folder that it imports (directly or indirectly), the competitive_sudoku package and this script.
+    @param module_name: The name of a player module, as it is passed to load_player.
+    @return: The locations of the files and folders.
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    framework = os.path.join(root, 'competitive_sudoku')
+    folders = []
+    todo = [player_folder(module_name)]
+    while todo:
+        folder = todo.pop()
+        if folder in folders:
+            continue
+        folders.append(folder)
+        # a module in a subfolder can also import the other modules in its subfolder, see load_player
+        for name in imported_modules(folder):
+            for base in {root, os.path.dirname(folder)}:
+                candidate = os.path.join(base, name)
+                if candidate != framework and os.path.isdir(candidate):
+                    todo.append(candidate)
+    return folders + [framework, os.path.abspath(__file__)]
+
+
+def player_hash(module_name: str) -> str:
+    """
+    Computes a hash of the code that determines how a player plays, see player_dependencies. Games are stored in a
+    results database under the hashes of both players, so that they are played again if any of this code changes.
+    @param module_name: The name of a player module, as it is passed to load_player.
+    @return: The hash.
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    return hash_paths(root, player_dependencies(module_name))
+
+
+def load_player(module_name: str, player_number: int, solve_sudoku_path: str) -> SudokuAI:
+    """
+    Creates the SudokuAI of a player.
+    @param module_name: The name of the module that contains the SudokuAI class, e.g. 'random_player'. Modules in
+    a subfolder are given as a path relative to this script, e.g. 'Sub_Iterations_A1/team43_A1_new'. The subfolder is
+    then added to the module search path, since these modules import themselves by their own name.
+    @param player_number: The number of the player, i.e. 1 or 2.
+    @param solve_sudoku_path: The location of the solve_sudoku executable, which is used by the example players.
+    @return: The SudokuAI object.
+    """
+    if '/' in module_name:
+        folder, module_name = module_name.rsplit('/', 1)
+        folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), folder)
+        if folder not in sys.path:
+            sys.path.append(folder)
+    module = importlib.import_module(module_name + '.sudokuai')
+    player = module.SudokuAI()
+    player.player_number = player_number
+    if module_name in ('random_player', 'greedy_player', 'random_save_player'):
+        player.solve_sudoku_path = solve_sudoku_path
+    return player
+
+
+def remove_saved_data() -> None:
+    """
+    Removes the files that were saved by the players in the current working directory.
+    """
+    for name in ['-1.pkl', '1.pkl', '2.pkl']:
+        if os.path.isfile(os.path.join(os.getcwd(), name)):
+            os.remove(os.path.join(os.getcwd(), name))
 
 
 def check_oracle(solve_sudoku_path: str) -> None:
@@ -34,102 +173,193 @@ def check_oracle(solve_sudoku_path: str) -> None:
         print(output)
 
 
-def simulate_game(initial_board: SudokuBoard, player1: SudokuAI, player2: SudokuAI, solve_sudoku_path: str, calculation_time: float = 0.5) -> None:
+def query_oracle(board: SudokuBoard, move: Move, solve_sudoku_path: Optional[str] = None, oracle_pool: Optional[OraclePool] = None, witness_oracle: Optional[WitnessOracle] = None) -> MoveResult:
+    """
+    Asks the oracle for the outcome of a move.
+    @param board: The current position.
+    @param move: The move.
+    @param solve_sudoku_path: The location of the oracle executable, or None.
+    @param oracle_pool: A pool of oracle workers, or None.
+    @param witness_oracle: An in-process oracle that tracks board, or None. If all three are None, the in-process
+    oracle is used without witnesses.
+    @return: The verdict of the oracle.
+    """
+    if witness_oracle is not None:
+        return witness_oracle.check_move(move)
+    if solve_sudoku_path is None and oracle_pool is None:
+        return check_move(board, move)
+    board_text = str(board)
+    options = f'--move "{board.rc2f(move.i, move.j)} {move.value}"'
+    if oracle_pool is not None:
+        output = oracle_pool.solve_sudoku(board_text, options)
+    else:
+        output = solve_sudoku(solve_sudoku_path, board_text, options)
+    return parse_move_output(output)
+
+
+def compute_best_move_until_done(player: SudokuAI, game_state: GameState) -> None:
+    """
+    Runs player.compute_best_move, and declares the player done when it returns or fails.
+    """
+    try:
+        player.start_search()
+        player.compute_best_move(game_state)
+    except BudgetExhausted:
+        pass
+    finally:
+        player.declare_done()
+
+
+def simulate_game(initial_board: SudokuBoard, player1: SudokuAI, player2: SudokuAI, solve_sudoku_path: Optional[str] = None, calculation_time: float = 0.5, oracle_pool: Optional[OraclePool] = None, oracle_cache: Optional[OracleCache] = None, persistent_workers: bool = False, early_finish: bool = False, quiet: bool = False, recorder: Optional[GameRecorder] = None, budget: Optional[SearchBudget] = None, seed: Optional[int] = None) -> GameResult:
     """
     Simulates a game between two instances of SudokuAI, starting in initial_board. The first move is played by player1.
     @param initial_board: The initial position of the game.
     @param player1: The AI of the first player.
     @param player2: The AI of the second player.
-    @param solve_sudoku_path: The location of the oracle executable.
+    @param solve_sudoku_path: The location of the oracle executable. If it is None, the in-process oracle
+    competitive_sudoku.oracle is used instead.
     @param calculation_time: The amount of time in seconds for computing the best move.
+    @param oracle_pool: If it is not None, the oracle queries are answered by this pool of oracle workers.
+    @param oracle_cache: If it is not None, the answers of the oracle are memoized in this cache.
+    @param persistent_workers: If True, each player computes all its moves in one long-lived process, see
+    competitive_sudoku.player_worker.
+    @param early_finish: If True, the next move starts as soon as a player has declared that it is done with its
+    move (see SudokuAI.declare_done), or when its compute_best_move function returns.
+    @param quiet: If True, the board is not printed after every move.
+    @param recorder: If it is not None, the moves are written to this record.
+    @param budget: If it is not None, the search of the players is limited by this budget, and the next move starts as
+    soon as a player is done. The calculation time is then only an upper bound.
+    @param seed: If it is not None, the random generators of the players are reset with this seed for every move.
+    @return: The outcome of the game.
     """
-    import copy
     N = initial_board.N
 
-    game_state = GameState(initial_board, copy.deepcopy(initial_board), [], [], [0, 0])
+    game_state = GameState(initial_board, ZobristSudokuBoard.from_board(initial_board), [], [], [0, 0])
     move_number = 0
     number_of_moves = initial_board.squares.count(SudokuBoard.empty)
+    move_times = []
+    witness_oracle = WitnessOracle(game_state.board) if solve_sudoku_path is None and oracle_pool is None else None
     print('Initial state')
-    print(game_state)
+    print(f'Score: {game_state.scores[0]} - {game_state.scores[1]}' if quiet else game_state)
+
+    workers = (PlayerWorker(player1), PlayerWorker(player2)) if persistent_workers else ()
+    with contextlib.ExitStack() as stack:
+        for worker in workers:
+            stack.enter_context(worker)
 
-    with multiprocessing.Manager() as manager:
-        # use a lock to protect assignments to best_move
-        lock = multiprocessing.Lock()
-        player1.lock = lock
-        player2.lock = lock
+        # use a lock per player, to make sure that a player is not terminated while it saves or loads data
+        player1.lock = multiprocessing.Lock()
+        player2.lock = multiprocessing.Lock()
 
-        # use shared variables to store the best move
-        player1.best_move = manager.list([0, 0, 0])
-        player2.best_move = manager.list([0, 0, 0])
+        # use shared memory to store the best move, see competitive_sudoku.move_slot
+        player1.best_move = BestMoveSlot()
+        player2.best_move = BestMoveSlot()
+
+        # a search budget replaces the time limit, so the players must be able to tell that they are done
+        if budget is not None:
+            early_finish = True
+        for player in [player1, player2]:
+            player.budget = budget
+            player.seed = seed
+
+        # use events to let the players tell that they are done with their move
+        player1.done_event = multiprocessing.Event() if early_finish else None
+        player2.done_event = multiprocessing.Event() if early_finish else None
 
         while move_number < number_of_moves:
             player, player_number = (player1, 1) if len(game_state.moves) % 2 == 0 else (player2, 2)
             print(f'-----------------------------\nCalculate a move for player {player_number}')
-            player.best_move[0] = 0
-            player.best_move[1] = 0
-            player.best_move[2] = 0
+            player.best_move.store(0, 0, 0)
+            version = player.best_move.version()
+            start_time = time.perf_counter()
+            player.calculation_time = calculation_time
+            player.deadline = time.monotonic() + calculation_time
             try:
-                process = multiprocessing.Process(target=player.compute_best_move, args=(game_state,))
-                process.start()
-                time.sleep(calculation_time)
-                lock.acquire()
-                process.terminate()
-                lock.release()
+                if workers:
+                    workers[player_number-1].compute_best_move(game_state, calculation_time)
+                else:
+                    process = multiprocessing.Process(target=compute_best_move_until_done, args=(player, game_state))
+                    if early_finish:
+                        player.done_event.clear()
+                        process.start()
+                        player.done_event.wait(calculation_time)
+                    else:
+                        process.start()
+                        time.sleep(calculation_time)
+                    player.lock.acquire()
+                    process.terminate()
+                    player.lock.release()
+                    process.join()
             except Exception as err:
                 print('Error: an exception occurred.\n', err)
+            move_times.append(time.perf_counter() - start_time)
+            proposals = player.best_move.version() - version
             i, j, value = player.best_move
             best_move = Move(i, j, value)
             print(f'Best move: {best_move}')
             player_score = 0
             if best_move != Move(0, 0, 0):
-                if TabooMove(i, j, value) in game_state.taboo_moves:
+                if game_state.taboo_moves.contains(i, j, value):
                     print(f'Error: {best_move} is a taboo move. Player {3-player_number} wins the game.')
-                    return
-                board_text = str(game_state.board)
-                options = f'--move "{game_state.board.rc2f(i, j)} {value}"'
-                output = solve_sudoku(solve_sudoku_path, board_text, options)
-                if 'Invalid move' in output:
+                    return GameResult(3-player_number, game_state, move_times)
+                if oracle_cache is not None:
+                    result = oracle_cache.get(move_key(game_state.board, best_move),
+                                              lambda: query_oracle(game_state.board, best_move, solve_sudoku_path, oracle_pool, witness_oracle))
+                else:
+                    result = query_oracle(game_state.board, best_move, solve_sudoku_path, oracle_pool, witness_oracle)
+                if result.status == MoveResult.INVALID:
                     print(f'Error: {best_move} is not a valid move. Player {3-player_number} wins the game.')
-                    return
-                if 'Illegal move' in output:
+                    return GameResult(3-player_number, game_state, move_times)
+                if result.status == MoveResult.ILLEGAL:
                     print(f'Error: {best_move} is not a legal move. Player {3-player_number} wins the game.')
-                    return
-                if 'has no solution' in output:
+                    return GameResult(3-player_number, game_state, move_times)
+                if result.status == MoveResult.NO_SOLUTION:
                     print(f'The sudoku has no solution after the move {best_move}.')
                     player_score = 0
-                    game_state.moves.append(TabooMove(i, j, value))
-                    game_state.taboo_moves.append(TabooMove(i, j, value))
-                if 'The score is' in output:
-                    match = re.search(r'The score is ([-\d]+)', output)
-                    if match:
-                        player_score = int(match.group(1))
-                        game_state.board.put(i, j, value)
-                        game_state.moves.append(best_move)
-                        move_number = move_number + 1
-                    else:
-                        raise RuntimeError(f'Unexpected output of sudoku solver: "{output}".')
+                    game_state.apply(TabooMove(i, j, value))
+                if result.status == MoveResult.SCORED:
+                    player_score = result.score
+                    game_state.apply(best_move, player_score)
+                    if witness_oracle is not None:
+                        witness_oracle.apply(best_move)
+                    move_number = move_number + 1
             else:
                 print(f'No move was supplied. Player {3-player_number} wins the game.')
-                return
-            game_state.scores[player_number-1] = game_state.scores[player_number-1] + player_score
+                return GameResult(3-player_number, game_state, move_times)
+            if recorder is not None:
+                recorder.record(player_number, best_move, player_score, result.status == MoveResult.NO_SOLUTION, proposals, move_times[-1])
             print(f'Reward: {player_score}')
-            print(game_state)
+            print(f'Score: {game_state.scores[0]} - {game_state.scores[1]}' if quiet else game_state)
         if game_state.scores[0] > game_state.scores[1]:
             print('Player 1 wins the game.')
+            return GameResult(1, game_state, move_times)
         elif game_state.scores[0] == game_state.scores[1]:
             print('The game ends in a draw.')
+            return GameResult(0, game_state, move_times)
         elif game_state.scores[0] < game_state.scores[1]:
             print('Player 2 wins the game.')
+            return GameResult(2, game_state, move_times)
 
 
 def main():
-    solve_sudoku_path = 'bin\\solve_sudoku.exe' if platform.system() == 'Windows' else 'bin/solve_sudoku'
+    solve_sudoku_path = default_solve_sudoku_path()
 
     cmdline_parser = argparse.ArgumentParser(description='Script for simulating a competitive sudoku game.')
     cmdline_parser.add_argument('--first', help="the module name of the first player's SudokuAI class (default: random_player)", default='random_player')
     cmdline_parser.add_argument('--second', help="the module name of the second player's SudokuAI class (default: random_player)", default='random_player')
     cmdline_parser.add_argument('--time', help="the time (in seconds) for computing a move (default: 0.5)", type=float, default=0.5)
     cmdline_parser.add_argument('--check', help="check if the solve_sudoku program works", action='store_true')
+    cmdline_parser.add_argument('--external-oracle', help="let the referee use the solve_sudoku program instead of the in-process oracle", action='store_true')
+    cmdline_parser.add_argument('--oracle-cache', metavar='FILE', type=str, help="memoize the answers of the oracle, and store them in FILE across games")
+    cmdline_parser.add_argument('--oracle-workers', metavar='N', type=int, default=0, help="let the referee use a pool of N persistent oracle workers (default: 0, i.e. no pool)")
+    cmdline_parser.add_argument('--persistent-workers', help="let each player compute all its moves in one long-lived process, that is stopped cooperatively after each move", action='store_true')
+    cmdline_parser.add_argument('--early-finish', help="continue with the next move as soon as a player is done with its move", action='store_true')
+    cmdline_parser.add_argument('--quiet', help="do not print the board after every move", action='store_true')
+    cmdline_parser.add_argument('--record', metavar='FILE', type=str, help="write the moves of the game to FILE in the JSON lines format")
+    cmdline_parser.add_argument('--nodes', metavar='N', type=int, help="limit the search of the players to N nodes per move instead of a time; --time is then only an upper bound")
+    cmdline_parser.add_argument('--iterations', metavar='N', type=int, help="limit the search of the players to N iterations per move (of iterative deepening or MCTS)")
+    cmdline_parser.add_argument('--depth', metavar='N', type=int, help="limit the search of the players to depth N")
+    cmdline_parser.add_argument('--seed', type=int, help="seed the random generators of the players for every move (default: 0 if a search limit is given)")
     cmdline_parser.add_argument('--board', metavar='FILE', type=str, help='a text file containing the start position')
     args = cmdline_parser.parse_args()
 
@@ -147,26 +377,27 @@ def main():
         board_text = Path(args.board).read_text()
     board = load_sudoku_from_text(board_text)
 
-    module1 = importlib.import_module(args.first + '.sudokuai')
-    module2 = importlib.import_module(args.second + '.sudokuai')
-    player1 = module1.SudokuAI()
-    player2 = module2.SudokuAI()
-    player1.player_number = 1
-    player2.player_number = 2
-    if args.first in ('random_player', 'greedy_player', 'random_save_player'):
-        player1.solve_sudoku_path = solve_sudoku_path
-    if args.second in ('random_player', 'greedy_player', 'random_save_player'):
-        player2.solve_sudoku_path = solve_sudoku_path
+    player1 = load_player(args.first, 1, solve_sudoku_path)
+    player2 = load_player(args.second, 2, solve_sudoku_path)
 
     #clean up files
-    if os.path.isfile(os.path.join(os.getcwd(), '-1.pkl')): #Check if there actually is something
-        os.remove(os.path.join(os.getcwd(), '-1.pkl'))
-    if os.path.isfile(os.path.join(os.getcwd(), '1.pkl')): #Check if there actually is something
-        os.remove(os.path.join(os.getcwd(), '1.pkl'))
-    if os.path.isfile(os.path.join(os.getcwd(), '2.pkl')): #Check if there actually is something
-        os.remove(os.path.join(os.getcwd(), '2.pkl'))
-
-    simulate_game(board, player1, player2, solve_sudoku_path=solve_sudoku_path, calculation_time=args.time)
+    remove_saved_data()
+
+    budget = None
+    seed = args.seed
+    if args.nodes is not None or args.iterations is not None or args.depth is not None:
+        budget = SearchBudget(nodes=args.nodes, iterations=args.iterations, depth=args.depth)
+        seed = 0 if seed is None else seed
+
+    referee_oracle_path = solve_sudoku_path if args.external_oracle else None
+    oracle_pool = shared_pool(args.oracle_workers) if args.oracle_workers > 0 else None
+    oracle_cache = OracleCache(path=args.oracle_cache) if args.oracle_cache else None
+    with contextlib.ExitStack() as stack:
+        recorder = stack.enter_context(GameRecorder(args.record)) if args.record else None
+        simulate_game(board, player1, player2, solve_sudoku_path=referee_oracle_path, calculation_time=args.time, oracle_pool=oracle_pool, oracle_cache=oracle_cache, persistent_workers=args.persistent_workers, early_finish=args.early_finish, quiet=args.quiet, recorder=recorder, budget=budget, seed=seed)
+    if oracle_cache is not None:
+        oracle_cache.save()
+        print(oracle_cache)
 
 
 
@@ -4,7 +4,7 @@
 
 import random
 import time
-from competitive_sudoku.sudoku import GameState, Move, SudokuBoard, TabooMove
+from competitive_sudoku.sudoku import BitmaskSudokuBoard, GameState
 import competitive_sudoku.sudokuai
 
 
@@ -18,14 +18,8 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
 
     # N.B. This is a very naive implementation.
     def compute_best_move(self, game_state: GameState) -> None:
-        N = game_state.board.N
-
-        def possible(i, j, value):
-            return game_state.board.get(i, j) == SudokuBoard.empty \
-                   and not TabooMove(i, j, value) in game_state.taboo_moves
-
-        all_moves = [Move(i, j, value) for i in range(N) for j in range(N)
-                     for value in range(1, N+1) if possible(i, j, value)]
+        board = BitmaskSudokuBoard.from_board(game_state.board)
+        all_moves = board.legal_moves(game_state.taboo_moves)
         move = random.choice(all_moves)
         self.propose_move(move)
         while True:
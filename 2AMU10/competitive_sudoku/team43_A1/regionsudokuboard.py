@@ -45,6 +45,13 @@ class RegionSudokuBoard(object):
         self.m = m
         self.N = N
         
+        # Give every board its own tables, so that several boards can be created in the same process
+        self.keyGenerator = []
+        self.cells = []
+        self.rowRegions = []
+        self.colRegions = []
+        self.boxRegions = []
+        
         # Create key table
         for i in range(N):
             self.keyGenerator.append([])
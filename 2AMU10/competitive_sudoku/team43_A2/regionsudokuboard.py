@@ -1,8 +1,8 @@
-import random
 import time
 import math
-import sys
 from competitive_sudoku.sudoku import GameState, Move, SudokuBoard, TabooMove
+from competitive_sudoku.topology import topology
+from competitive_sudoku.zobrist import zobrist_table
 from team43_A2.region import Region
 from team43_A2.cell import Cell
 from typing import List
@@ -16,8 +16,10 @@ class RegionSudokuBoard(object):
     # The dictionary storing the moves
     moveListDict = {}
     
-    # The table that stores the random values used to generate the key value of the board
+    # The tables that store the random values used to generate the key value of the board, for the values of the
+    # cells and for the taboo moves
     keyGenerator = []
+    tabooKeyGenerator = []
     
     # The key value for a board
     key = 0
@@ -25,6 +27,9 @@ class RegionSudokuBoard(object):
     # The value used for the empty cell
     emptyState = 0
     
+    # The precomputed tables of the framework for boards of this shape, such as the index of a cell and its box
+    topology = None
+    
     # The amount of empty squares in the sudoku
     emptyCount = 0
     
@@ -48,13 +53,17 @@ class RegionSudokuBoard(object):
         self.m = m
         self.N = N
         
-        # Create key table
-        for i in range(N):
-            self.keyGenerator.append([])
-            for j in range(N):
-                self.keyGenerator[i].append([])
-                for k in range(N+1):
-                    self.keyGenerator[i][j].append(random.randint(0,sys.maxsize))
+        # Give every board its own tables, so that several boards can be created in the same process
+        self.moveListDict = {}
+        self.cells = []
+        self.rowRegions = []
+        self.colRegions = []
+        self.boxRegions = []
+        self.topology = topology(m, n)
+        
+        # Get the key tables of the framework, which are the same for every move, so they do not have to be created
+        self.keyGenerator = zobrist_table(m, n)
+        self.tabooKeyGenerator = zobrist_table(m, n, 'taboo')
 
         # Initiallize the region objects and the empty state
         self.emptyState = game_state.board.empty
@@ -80,7 +89,7 @@ class RegionSudokuBoard(object):
                 cell = Cell(i, j, value)
                 row = i
                 col = j
-                box = (i//m)*m + j//n
+                box = self.topology.box_of[self.topology.index[i][j]]
                 cell.rowRegion = self.rowRegions[row]
                 cell.colRegion = self.colRegions[col]
                 cell.boxRegion = self.boxRegions[box]
@@ -152,7 +161,7 @@ class RegionSudokuBoard(object):
                 
                 # If this position with this value is a taboo move in the list,
                 # then this is not possible and we go to the next value
-                if TabooMove(i, j, value) in tabooMoves:
+                if tabooMoves.contains(i, j, value):
                     continue
                 
                 # If in the row, column or box that this cell is in already contains this value,
@@ -8,9 +8,17 @@ import math
 from competitive_sudoku.sudoku import GameState, Move, SudokuBoard, TabooMove
 import competitive_sudoku.sudokuai
 from team43_A2.regionsudokuboard import RegionSudokuBoard
+from team43_A2.timemanager import CLEAR_POINTS, TimeManager
 from typing import List
 
 
+class TimeUp(Exception):
+    """
+    Raised inside the search when the deadline of the move has passed, to abandon the current iteration
+    """
+    pass
+
+
 class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
     """
     Sudoku AI that computes a move for a given sudoku configuration.
@@ -36,10 +44,10 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
         board = RegionSudokuBoard(game_state)
         
         # Create all moves for the first time using the board
-        all_moves, _ = board.get_moves(game_state.taboo_moves)
+        all_moves, mistakeMoves = board.get_moves(game_state.taboo_moves)
         
         # Pick a random move for now
-        randomMove = random.choice(all_moves)[0]
+        randomMove = self.random.choice(all_moves)[0]
         self.propose_move(randomMove)
         
         # Start with depth 1 for iterative deepening
@@ -48,8 +56,25 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
         # The starting difference between the scores of the current state seeing our player as maximizing player
         dif = game_state.scores[0]-game_state.scores[1] if game_state.current_player() == 1 else game_state.scores[1]-game_state.scores[0]
         
+        # The maximum depth of a search budget, if there is one
+        maxDepth = self.max_depth()
+        
+        # The duration of the previous iteration, the next iteration takes at least as long
+        lastIterationTime = 0.0
+        
+        # The time manager decides when we have searched long enough
+        timeManager = TimeManager(self, board, len(all_moves), mistakeMoves)
+        
         # Our iteritive deepening loop, if the depth is more than the number of empty squares it does not improve anymore
-        while depth <= len(all_moves):
+        while depth <= len(all_moves) and (maxDepth is None or depth <= maxDepth):
+            
+            # If the next iteration cannot be finished before the deadline, stop so the game can continue. With a search
+            # budget the budget decides when to stop, so that the search does not depend on the speed of the machine
+            if self.budget is None and self.time_left() < lastIterationTime:
+                break
+            
+            # Count the iteration for the search budget, this stops the search if the budget is used up
+            self.count_iteration()
             
             # A transposition table used to check for states we have already computed
             transpositionTable = {}
@@ -58,15 +83,29 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
             alpha = -math.inf
             beta = math.inf
 
-            # Run minimax
-            eval, move = self.minimax(board, game_state.taboo_moves, depth, True, dif, alpha, beta, transpositionTable)
+            # Run minimax, if the deadline passes during the search the move of the previous depth is kept
+            iterationStart = time.monotonic()
+            rootValues = []
+            try:
+                eval, move = self.minimax(board, game_state.taboo_moves, depth, True, dif, alpha, beta, transpositionTable, rootValues)
+            except TimeUp:
+                break
+            lastIterationTime = time.monotonic() - iterationStart
             
             # Propose the best move for this depth and go to the next
             self.propose_move(move)
             depth += 1
+            
+            # The choice is clear if the best move is worth at least CLEAR_POINTS more than the others, note that the values
+            # of the other moves are upper bounds due to the alpha beta pruning, so the real difference is at least as large
+            rootValues.sort()
+            clear = len(rootValues) < 2 or rootValues[-1] - rootValues[-2] >= CLEAR_POINTS*8*N
+            timeManager.update(move, clear)
+            if timeManager.shouldStop():
+                break
     
     def minimax(self, board: RegionSudokuBoard, tabooMoves: List[TabooMove], depth: int, 
-                maximizingPlayer: bool, score, alpha, beta, transpositionTable):
+                maximizingPlayer: bool, score, alpha, beta, transpositionTable, rootValues=None):
         """
         Runs minimax from a given position
         @param board: an instance of the given sudoku board in the {RegionSudokuBoard} datastructure
@@ -77,12 +116,20 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
         @param alpha: the alpha parameter for alpha beta pruning
         @param beta: the beta parameter for alpha beta pruning
         @param transpositionTable: the table used to check if the position has already been computed before
+        @param rootValues: if this is not None, the values of the moves from this position are appended to it
         @return the score for this board state by the minimax algorithm or "mistake"
         """
         
         N = board.N
         n = board.n
         m = board.m
+        
+        # Count the node for the search budget, this stops the search if the budget is used up
+        self.count_node()
+        
+        # Abandon the search if the deadline has passed
+        if self.should_stop():
+            raise TimeUp()
 
         # If the game is over or the depth is 0, return the evaluation of the state
         if depth == 0 or board.emptyCount == 0:
@@ -200,6 +247,10 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
                         emptyCol.remove((move.value, cell.rowRegion, cell.boxRegion))
                     continue
                 
+                # Store the value of the move if this is the root of the search, for the time manager
+                if rootValues is not None:
+                    rootValues.append(eval)
+                
                 # If no mistake was made update the best score and move if needed and update alpha for the alpha beta pruning
                 if bestscore < eval:
                     bestscore = eval
@@ -226,7 +277,7 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
                 
                 # Make a new key for the board, since the taboo moves have changed and add the new movesets to it
                 prev_moves = board.get_moves(tabooMoves)[0].copy()
-                board.key ^= board.keyGenerator[move.i][move.j][move.value-1]
+                board.key ^= board.tabooKeyGenerator[move.i][move.j][move.value]
                 board.moveListDict[board.key] = (prev_moves, newMistakeMoves)
                 
                 # Run minimax from the others turn on the current state
@@ -234,12 +285,16 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
                                        alpha, beta, transpositionTable)
                 
                 # Reset the key of the board
-                board.key ^= board.keyGenerator[move.i][move.j][move.value-1]
+                board.key ^= board.tabooKeyGenerator[move.i][move.j][move.value]
                 
                 # If this move is also a mistake, then the current move is a mistake
                 if eval == "mistake":
                     return "mistake", None
                 
+                # Store the value of the move if this is the root of the search, for the time manager
+                if rootValues is not None:
+                    rootValues.append(eval)
+                
                 # If no mistake was made update the best score and move if needed and update alpha for the alpha beta pruning
                 if bestscore < eval:
                     bestscore = eval
@@ -365,7 +420,7 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
                 
                 # Make a new key for the board, since the taboo moves have changed and add the new movesets to it
                 prev_moves = board.get_moves(tabooMoves)[0].copy()
-                board.key ^= board.keyGenerator[move.i][move.j][move.value-1]
+                board.key ^= board.tabooKeyGenerator[move.i][move.j][move.value]
                 board.moveListDict[board.key] = (prev_moves, newMistakeMoves)
                 
                 # Run minimax from the others turn on the current state
@@ -373,7 +428,7 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
                                        alpha, beta, transpositionTable)
                 
                 # Reset the key of the board
-                board.key ^= board.keyGenerator[move.i][move.j][move.value-1]
+                board.key ^= board.tabooKeyGenerator[move.i][move.j][move.value]
                 
                 # If this move is also a mistake, then the current move is a mistake
                 if eval == "mistake":
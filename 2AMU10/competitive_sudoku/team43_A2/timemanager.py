@@ -0,0 +1,100 @@
+import math
+import time
+
+# N.B. team43_A2 and team43_A3 each have an identical copy of this module, since every player is handed in as a single
+# folder. Keep the copies equal, tests/test_timemanager.py checks this.
+
+# The share of the time that is used in a quiet position grows linearly from MIN_SHARE on an empty board to
+# MIN_SHARE + PHASE_SHARE on a full board, since the moves at the start hardly influence the score
+MIN_SHARE = 0.3
+PHASE_SHARE = 0.5
+
+# A best move that survived STABLE_ITERATIONS checks rarely changes anymore, so it only gets STABLE_FACTOR of the share
+STABLE_ITERATIONS = 4
+STABLE_FACTOR = 0.5
+
+# A best move that is also clearly better than the others is settled sooner, and gets CLEAR_FACTOR of the share
+CLEAR_ITERATIONS = 2
+CLEAR_FACTOR = 0.25
+
+# The lead over the second best move that makes a choice clear. For minimax it is one point of the score, which the
+# evaluation of team43_A2 weighs with 8*N. For MCTS it is a win rate of 0.2, four times the standard error of a win
+# rate after a hundred playouts.
+CLEAR_POINTS = 1
+CLEAR_WINRATE = 0.2
+
+
+class TimeManager(object):
+    """
+    Decides how much of the time for a move is used. The search is stopped early when the choice is clear, and it
+    gets the full time in critical positions.
+    """
+
+    def __init__(self, ai, board, moveCount, mistakeMoves):
+        """
+        @param ai: the SudokuAI that computes the move, it knows the deadline of the move
+        @param board: the current position in the {RegionSudokuBoard} datastructure
+        @param moveCount: the number of moves that can be played in the current position
+        @param mistakeMoves: the moves that will become taboo moves, which can be played to pass the turn
+        """
+        self.start = time.monotonic()
+        self.available = ai.time_left()
+
+        # With a search budget the search must not depend on time, and without a deadline we do not know the time
+        self.active = ai.budget is None and self.available != math.inf
+
+        # The best move of the last iteration, the number of iterations in which it did not change and whether it
+        # is clearly better than the other moves
+        self.bestMove = None
+        self.stableIterations = 0
+        self.clear = False
+
+        # If there is only one move, there is nothing to think about
+        self.forced = moveCount + len(mistakeMoves) <= 1
+
+        # A position is critical if a region can be completed with one move, or if we can pass the turn with a
+        # mistake move, since then the parity of the rest of the game is at stake
+        regions = board.rowRegions + board.colRegions + board.boxRegions
+        self.critical = len(mistakeMoves) > 0 or any(region.filled == board.N-1 for region in regions)
+
+        # The share of the time that is used in a quiet position grows with the game phase, at the end every move can
+        # decide the game
+        filledShare = 1 - board.emptyCount / (board.N * board.N)
+        self.share = MIN_SHARE + PHASE_SHARE * filledShare
+
+    def update(self, bestMove, clear):
+        """
+        Tells the time manager the result of an iteration
+        @param bestMove: the best move after the iteration
+        @param clear: whether the best move is clearly better than the other moves
+        """
+        if self.bestMove is not None and bestMove == self.bestMove:
+            self.stableIterations += 1
+        else:
+            self.bestMove = bestMove
+            self.stableIterations = 0
+        self.clear = clear
+
+    def shouldStop(self):
+        """
+        Determines if the search should stop, which is checked after every iteration
+        @return whether the search should stop
+        """
+        if not self.active or self.bestMove is None:
+            return False
+        if self.forced:
+            return True
+
+        # In critical positions we use all the time, the deadline will stop the search
+        if self.critical:
+            return False
+
+        # A best move that just changed needs the full time to be confirmed, a stable or clear best move needs less
+        target = self.share * self.available
+        if self.stableIterations == 0:
+            target = self.available
+        elif self.clear and self.stableIterations >= CLEAR_ITERATIONS:
+            target *= CLEAR_FACTOR
+        elif self.stableIterations >= STABLE_ITERATIONS:
+            target *= STABLE_FACTOR
+        return time.monotonic() - self.start >= target
@@ -3,8 +3,9 @@ import io
 import random
 import time
 import math
-import sys
 from competitive_sudoku.sudoku import GameState, Move, SudokuBoard, TabooMove
+from competitive_sudoku.topology import topology
+from competitive_sudoku.zobrist import zobrist_table
 from team43_A3.region import Region
 from team43_A3.cell import Cell
 from typing import List
@@ -43,6 +44,9 @@ class RegionSudokuBoard(object):
     # The value used for the empty cell
     emptyState = 0
     
+    # The precomputed tables of the framework for boards of this shape, such as the index of a cell and its box
+    topology = None
+    
     # The amount of empty squares in the sudoku
     emptyCount = 0
     
@@ -66,16 +70,21 @@ class RegionSudokuBoard(object):
         self.m = m
         self.N = N
         
-        # Create key table
-        for i in range(N):
-            self.keyGenerator.append([])
-            self.moveKeyGenerator.append([])
-            for j in range(N):
-                self.keyGenerator[i].append([])
-                self.moveKeyGenerator[i].append([])
-                for k in range(N+1):
-                    self.keyGenerator[i][j].append(random.randint(0,sys.maxsize))
-                    self.moveKeyGenerator[i][j].append(random.randint(0,sys.maxsize))
+        # Give every board its own tables, so that several boards can be created in the same process
+        self.moveListDict = {}
+        self.zorbristToCanonical = {}
+        self.perm = {}
+        self.bitboard = []
+        self.canonicalForm = []
+        self.cells = []
+        self.rowRegions = []
+        self.colRegions = []
+        self.boxRegions = []
+        self.topology = topology(m, n)
+        
+        # Get the key tables of the framework, which are the same for every move, so they do not have to be created
+        self.keyGenerator = zobrist_table(m, n)
+        self.moveKeyGenerator = zobrist_table(m, n, 'moves')
 
         # Initiallize the region objects and the empty state
         self.emptyState = game_state.board.empty
@@ -101,7 +110,7 @@ class RegionSudokuBoard(object):
                 cell = Cell(i, j, value)
                 row = i
                 col = j
-                box = (i//m)*m + j//n
+                box = self.topology.box_of[self.topology.index[i][j]]
                 cell.rowRegion = self.rowRegions[row]
                 cell.colRegion = self.colRegions[col]
                 cell.boxRegion = self.boxRegions[box]
@@ -529,8 +538,8 @@ class RegionSudokuBoard(object):
         
         # If these moves have already been computed before, return that list
         if self.key in self.moveListDict:
-            possible_none_taboo_moves = [move for move in self.moveListDict[self.key][0] if TabooMove(move[0].i, move[0].j, move[0].value) not in tabooMoves]
-            mistake_none_taboo_moves = [move for move in self.moveListDict[self.key][1] if TabooMove(move[0].i, move[0].j, move[0].value) not in tabooMoves]
+            possible_none_taboo_moves = [move for move in self.moveListDict[self.key][0] if move[0] not in tabooMoves]
+            mistake_none_taboo_moves = [move for move in self.moveListDict[self.key][1] if move[0] not in tabooMoves]
             return (possible_none_taboo_moves, mistake_none_taboo_moves)
         
         # Initializing the set of moves
@@ -561,7 +570,7 @@ class RegionSudokuBoard(object):
         # After computing all these moves, add it to the table for whenever it is requested again
         self.moveListDict[self.key] = (moves, [])
         
-        none_taboo_moves = [move for move in moves if TabooMove(move[0].i, move[0].j, move[0].value) not in tabooMoves]
+        none_taboo_moves = [move for move in moves if move[0] not in tabooMoves]
 
         # Returns the set of moves
         return none_taboo_moves, []
@@ -840,7 +849,7 @@ class RegionSudokuBoard(object):
         """
         
         # Get all possible moves we can make
-        moves = [Move(cell.i, cell.j, index+1) for cell in self.cells for index, restrict in list(enumerate(cell.possibleValues)) if restrict == 0 and TabooMove(cell.i, cell.j, index+1) not in taboo_moves]
+        moves = [Move(cell.i, cell.j, index+1) for cell in self.cells for index, restrict in list(enumerate(cell.possibleValues)) if restrict == 0 and not taboo_moves.contains(cell.i, cell.j, index+1)]
         
         # If there are none its a mistake
         if len(moves) == 0:
@@ -855,8 +864,8 @@ class RegionSudokuBoard(object):
         # Decrement the empty count, since an empty position is filled in
         self.emptyCount -= 1
         
-        # Get the cell associated with the move
-        cell = [cell for cell in self.cells if cell.i == madeMove.i and cell.j == madeMove.j][0]
+        # Get the cell associated with the move, the cells are stored in the order of the board array
+        cell = self.cells[self.topology.index[madeMove.i][madeMove.j]]
         
         # Set the new value of the cell
         cell.value = madeMove.value
@@ -913,8 +922,8 @@ class RegionSudokuBoard(object):
         # Initializing a counter for the filled regions
         regionsFilled = 0
         
-        # Get the cell associated with the move
-        cell = [cell for cell in self.cells if move.i == cell.i and move.j == cell.j][0]
+        # Get the cell associated with the move, the cells are stored in the order of the board array
+        cell = self.cells[self.topology.index[move.i][move.j]]
         
         # Increment the regions filled for any region that is one from being filled
         if cell.rowRegion.filled == self.N-1:
@@ -960,7 +969,7 @@ class RegionSudokuBoard(object):
         out = io.StringIO()
 
         def print_square(i, j):
-            value = [cell.value for cell in self.cells if cell.i == i and cell.j == j][0]
+            value = self.cells[self.topology.index[i][j]].value
             s = '   .' if value == 0 else f'{value:>4}'
             out.write(s)
 
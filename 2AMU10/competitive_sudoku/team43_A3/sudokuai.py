@@ -10,10 +10,18 @@ import math
 from competitive_sudoku.sudoku import GameState, Move, SudokuBoard, TabooMove
 import competitive_sudoku.sudokuai
 from team43_A3.regionsudokuboard import RegionSudokuBoard
+from team43_A3.timemanager import CLEAR_WINRATE, TimeManager
 from typing import List
-import copy
 import json
 
+
+class TimeUp(Exception):
+    """
+    Raised inside the search when the deadline of the move has passed, to abandon the current iteration
+    """
+    pass
+
+
 class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
     """
     Sudoku AI that computes a move for a given sudoku configuration.
@@ -67,10 +75,10 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
         startMoveHash = board.getMoveHash(startBoardKey, game_state.taboo_moves)
         
         # Create all moves for the first time using the board
-        all_moves, _ = board.get_moves(game_state.taboo_moves)
+        all_moves, mistakeMoves = board.get_moves(game_state.taboo_moves)
         
         # Pick a random move for now
-        randomMove = random.choice(all_moves)
+        randomMove = self.random.choice(all_moves)
         self.propose_move(randomMove[0])
         
         # The starting difference between the scores of the current state seeing our player as maximizing player
@@ -84,22 +92,37 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
         bestMove = None
         bestIsMistake = None
         
+        # The time manager decides when we have searched long enough
+        timeManager = TimeManager(self, board, len(all_moves), mistakeMoves)
+        
+        # The time manager is consulted every 5% of the available time, since the duration of an iteration varies a lot
+        checkInterval = 0.05 * self.time_left()
+        nextCheck = time.monotonic() + checkInterval
+        
         # Keep iterating untill the time is over
-        while True:
+        while not self.should_stop():
+            # Count the iteration for the search budget, this stops the search if the budget is used up
+            self.count_iteration()
+            
             # Calculate the difference between the scores
             scoredif = game_state.scores[game_state.current_player()-1]-game_state.scores[2-game_state.current_player()]
 
-            # Run monte carlo tree search
-            winrate, visits, move, mistake = self.mcts(nodeTable, board, game_state.taboo_moves, scoredif, True, preNodeTable)
+            # Run monte carlo tree search, an iteration that is abandoned at the deadline does not change the best move
+            try:
+                winrate, visits, move, mistake = self.mcts(nodeTable, board, game_state.taboo_moves, scoredif, True, preNodeTable)
+            except TimeUp:
+                break
             
             # If a move was computed, compute if this move is better then what we had
             if move != None:
                 boardHash = startBoardHash
                 moveHash = 0
                 if mistake:
-                    new_taboo_moves = copy.copy(game_state.taboo_moves)
-                    new_taboo_moves.append(TabooMove(move[0].i, move[0].j, move[0].value))
-                    moveHash = board.getMoveHash(board.key, new_taboo_moves)
+                    game_state.taboo_moves.append(TabooMove(move[0].i, move[0].j, move[0].value))
+                    try:
+                        moveHash = board.getMoveHash(board.key, game_state.taboo_moves)
+                    finally:
+                        game_state.taboo_moves.pop()
                 else:
                     boardHash = board.getCanonicalHashAfterMove(move[0])
                     board.makeMove(move[0], move[1])
@@ -152,11 +175,25 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
                             bestIsMistake = childMistake
                     
                 self.propose_move(bestMove[0])
+            
+            # The time manager decides if we continue, the choice is clear if the win rate of the best move is at least
+            # CLEAR_WINRATE higher than that of the other moves
+            if time.monotonic() >= nextCheck and bestMove is not None and (startBoardHash, startMoveHash) in nodeTable:
+                nextCheck += checkInterval
+                winrates = sorted(nodeTable[childHash][0]/nodeTable[childHash][1] for _, childHash in nodeTable[(startBoardHash, startMoveHash)][2] \
+                                  if childHash in nodeTable and nodeTable[childHash][1] > 0)
+                clear = len(winrates) < 2 or winrates[-1] - winrates[-2] >= CLEAR_WINRATE
+                timeManager.update(bestMove, clear)
+                if timeManager.shouldStop():
+                    break
     
     def mcts(self, nodeTable, board: RegionSudokuBoard, taboo_moves, scoredif, maximizing_player, preNodeTable):
         """
         Runs monte carlo tree search
         """
+        # Count the node for the search budget, this stops the search if the budget is used up
+        self.count_node()
+        
         boardHash = board.getCanonicalHash()
         moveHash = board.getMoveHash(board.key, taboo_moves)
         
@@ -177,14 +214,14 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
                     else:
                         nodeTable[(boardHash, moveHash)] = (nodeTable[(boardHash, moveHash)][0], nodeTable[(boardHash, moveHash)][1]+1, nodeTable[(boardHash, moveHash)][2])
                         return 0, 1, None, False
-            random.shuffle(possible_moves)
+            self.random.shuffle(possible_moves)
             
             # Get the best possible move and best mistake move (if there are any) based on the UCT
             max_possible = max(possible_moves, key=lambda move: self.uct(board, move, nodeTable, False, taboo_moves))
             uct_possible = self.uct(board, max_possible, nodeTable, False, taboo_moves)
             uct_mistake = -math.inf
             if len(mistake_moves) > 0:
-                random.shuffle(mistake_moves)
+                self.random.shuffle(mistake_moves)
                 max_mistake = max(mistake_moves, key=lambda move: self.uct(board, move, nodeTable, True, taboo_moves))
                 uct_mistake = self.uct(board, max_mistake, nodeTable, True, taboo_moves)
                 
@@ -242,22 +279,25 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
             # If the mistake move was better, then play that move
             if uct_possible < uct_mistake:
                 
-                # Run mcts form here after this move
-                board.key = board.newHashOfMove(max_mistake[0], True)
-                new_taboo_list = copy.copy(taboo_moves)
-                new_taboo_list.append(TabooMove(max_mistake[0].i, max_mistake[0].j, max_mistake[0].value))
-                winrate, visits, move, mistake = self.mcts(nodeTable, board, new_taboo_list, scoredif, not maximizing_player, preNodeTable)
+                # Run mcts form here after this move, the mistake move is a taboo move until we are back
                 board.key = board.newHashOfMove(max_mistake[0], True)
+                taboo_moves.append(TabooMove(max_mistake[0].i, max_mistake[0].j, max_mistake[0].value))
+                try:
+                    winrate, visits, move, mistake = self.mcts(nodeTable, board, taboo_moves, scoredif, not maximizing_player, preNodeTable)
+                    board.key = board.newHashOfMove(max_mistake[0], True)
+                    
+                    # If this move was a mistake, then the mistake has been made earlier, 
+                    # as this was already a mistake move. Thus return mistake
+                    if winrate == "mistake":
+                        return "mistake", None, None, None
+                    
+                    # Update the table as we are now in the back propagation phase
+                    childList = nodeTable[(boardHash, moveHash)][2]
+                    if move == None:
+                        childList.append((max_mistake, (boardHash, board.getMoveHash(board.key, taboo_moves))))
+                finally:
+                    taboo_moves.pop()
                 
-                # If this move was a mistake, then the mistake has been made earlier, 
-                # as this was already a mistake move. Thus return mistake
-                if winrate == "mistake":
-                    return "mistake", None, None, None
-                
-                # Update the table as we are now in the back propagation phase
-                childList = nodeTable[(boardHash, moveHash)][2]
-                if move == None:
-                    childList.append((max_mistake, (boardHash, board.getMoveHash(board.key, new_taboo_list))))
                 if maximizing_player:
                     nodeTable[(boardHash, moveHash)] = (nodeTable[(boardHash, moveHash)][0]-winrate, nodeTable[(boardHash, moveHash)][1]+visits, childList)
                 else:
@@ -305,9 +345,11 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
             nextBoardHash = board.getCanonicalHashAfterMove(move[0])
         nextMoveHash = 0
         if mistake:
-            new_taboo_moves = copy.copy(taboo_moves)
-            new_taboo_moves.append(TabooMove(move[0].i, move[0].j, move[0].value))
-            nextMoveHash = board.getMoveHash(board.key, new_taboo_moves)
+            taboo_moves.append(TabooMove(move[0].i, move[0].j, move[0].value))
+            try:
+                nextMoveHash = board.getMoveHash(board.key, taboo_moves)
+            finally:
+                taboo_moves.pop()
         else:
             board.makeMove(move[0], move[1])
             nextMoveHash = board.getMoveHash(board.key, taboo_moves)
@@ -324,6 +366,13 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
         """
         Simulates a game
         """
+        # Count the node for the search budget, the simulation also searches when it backtracks over mistakes
+        self.count_node()
+        
+        # Abandon the search if the deadline has passed
+        if self.should_stop():
+            raise TimeUp()
+        
         # If we are at the end, return if we have won
         if board.emptyCount == 0:
             if scoredif > 0:
@@ -341,15 +390,15 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
             # Get a move, based on a greedy tactick or 10% of the time a random move
             madeMove = None
             if len(mistake_moves)%2 == 1:
-                if random.random() < 0.9:
+                if self.random.random() < 0.9:
                     madeMove = max(possible_moves+mistake_moves, key=lambda move: (board.regionsFilledAfterMove(move[0]), -move[1].valueCount, move[1].rowRegion.filled+move[1].colRegion.filled+move[1].boxRegion.filled))
                 else:
-                    madeMove = random.choice(possible_moves+mistake_moves)
+                    madeMove = self.random.choice(possible_moves+mistake_moves)
             else:
-                if random.random() < 0.9:
+                if self.random.random() < 0.9:
                     madeMove = max(possible_moves, key=lambda move: (board.regionsFilledAfterMove(move[0]), -move[1].valueCount, move[1].rowRegion.filled+move[1].colRegion.filled+move[1].boxRegion.filled))
                 else:
-                    madeMove = random.choice(possible_moves)
+                    madeMove = self.random.choice(possible_moves)
             
             # Make that move
             score = 0
@@ -367,15 +416,18 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
                 board.key = board.newHashOfMove(madeMove[0], True)
                 score = 0
             
-            # Run the simulation after making this move
-            new_taboo_list = copy.copy(taboo_moves)
-            if madeMove in mistake_moves:
-                new_taboo_list.append(TabooMove(madeMove[0].i, madeMove[0].j, madeMove[0].value))
-            
-            if maximizing_player:
-                winrate = self.simulation(board, new_taboo_list, scoredif+self.pointScore[score], not maximizing_player)
-            else:
-                winrate = self.simulation(board, new_taboo_list, scoredif-self.pointScore[score], not maximizing_player)
+            # Run the simulation after making this move, a mistake move is a taboo move until we are back
+            isMistake = madeMove in mistake_moves
+            if isMistake:
+                taboo_moves.append(TabooMove(madeMove[0].i, madeMove[0].j, madeMove[0].value))
+            try:
+                if maximizing_player:
+                    winrate = self.simulation(board, taboo_moves, scoredif+self.pointScore[score], not maximizing_player)
+                else:
+                    winrate = self.simulation(board, taboo_moves, scoredif-self.pointScore[score], not maximizing_player)
+            finally:
+                if isMistake:
+                    taboo_moves.pop()
             if madeMove in mistake_moves:
                 board.key = board.newHashOfMove(madeMove[0], True)
             else:
@@ -409,7 +461,7 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
             third = []
             for moveList, stringChildKey in values[2]:
                 move = Move(moveList[0], moveList[1], moveList[2])
-                cell = [cell for cell in board.cells if cell.i == move.i and cell.j == move.j][0]
+                cell = board.cells[board.topology.index[move.i][move.j]]
                 stringChildHashes = stringChildKey.split("_")
                 newChildKey = (int(stringChildHashes[0]), int(stringChildHashes[1]))
                 third.append(((move, cell), newChildKey))
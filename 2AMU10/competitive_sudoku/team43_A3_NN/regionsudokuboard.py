@@ -48,6 +48,14 @@ class RegionSudokuBoard(object):
         self.m = m
         self.N = N
         
+        # Give every board its own tables, so that several boards can be created in the same process
+        self.moveListDict = {}
+        self.keyGenerator = []
+        self.cells = []
+        self.rowRegions = []
+        self.colRegions = []
+        self.boxRegions = []
+        
         # Create key table
         for i in range(N):
             self.keyGenerator.append([])
@@ -152,7 +160,7 @@ class RegionSudokuBoard(object):
                 
                 # If this position with this value is a taboo move in the list,
                 # then this is not possible and we go to the next value
-                if TabooMove(i, j, value) in tabooMoves:
+                if tabooMoves.contains(i, j, value):
                     continue
                 
                 # If in the row, column or box that this cell is in already contains this value,
@@ -2,11 +2,12 @@
 #  Software License, (See accompanying file LICENSE or copy at
 #  https://www.gnu.org/licenses/gpl-3.0.txt)
 
+import os
 import random
 import time
 import math
 from datetime import datetime
-from competitive_sudoku.sudoku import GameState, Move, SudokuBoard, TabooMove
+from competitive_sudoku.sudoku import GameState, Move, SudokuBoard
 import competitive_sudoku.sudokuai
 from team43_A3_NN.regionsudokuboard import RegionSudokuBoard
 from team43_A3_NN.neuralnetwork import NeuralNetwork
@@ -44,8 +45,8 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
         randomMove = random.choice(all_moves)[0]
         self.propose_move(randomMove)
         
-        # Get the neural network
-        neural_net = NeuralNetwork(None, "trained_weights.txt")
+        # Get the neural network, the weights are stored in the folder that contains this module
+        neural_net = NeuralNetwork(None, os.path.join(os.path.dirname(os.path.abspath(__file__)), "trained_weights.txt"))
         
         # Get the output of the neural network for the given input
         nn_output = neural_net.call(self.input_vector(board, game_state.taboo_moves))
@@ -65,7 +66,7 @@ class SudokuAI(competitive_sudoku.sudokuai.SudokuAI):
             if cell.value != 0:
                 input[cell.i*(board.N**2)+cell.j*board.N+cell.value-1] = 1
         possibleMoves, mistakeMoves = board.get_moves(taboo_moves)
-        moves = [move for move in possibleMoves + mistakeMoves if TabooMove(move[0].i, move[0].j, move[0].value) not in taboo_moves]
+        moves = [move for move in possibleMoves + mistakeMoves if move[0] not in taboo_moves]
         for move, cell in moves:
             input[board.N**3+move.i*(board.N**2)+move.j*board.N+move.value-1] = 1
         return input
@@ -65,6 +65,19 @@ class RegionSudokuBoard(object):
         self.m = m
         self.N = N
         
+        # Give every board its own tables, so that several boards can be created in the same process
+        self.moveListDict = {}
+        self.zorbristToCanonical = {}
+        self.keyGenerator = []
+        self.moveKeyGenerator = []
+        self.perm = {}
+        self.bitboard = []
+        self.canonicalForm = []
+        self.cells = []
+        self.rowRegions = []
+        self.colRegions = []
+        self.boxRegions = []
+        
         # Create key table
         for i in range(N):
             self.keyGenerator.append([])
@@ -470,8 +483,8 @@ class RegionSudokuBoard(object):
         
         # If these moves have already been computed before, return that list
         if self.key in self.moveListDict:
-            possible_none_taboo_moves = [move for move in self.moveListDict[self.key][0] if TabooMove(move[0].i, move[0].j, move[0].value) not in tabooMoves]
-            mistake_none_taboo_moves = [move for move in self.moveListDict[self.key][1] if TabooMove(move[0].i, move[0].j, move[0].value) not in tabooMoves]
+            possible_none_taboo_moves = [move for move in self.moveListDict[self.key][0] if move[0] not in tabooMoves]
+            mistake_none_taboo_moves = [move for move in self.moveListDict[self.key][1] if move[0] not in tabooMoves]
             return (possible_none_taboo_moves, mistake_none_taboo_moves)
 
         # Initializing the set of moves
@@ -505,8 +518,8 @@ class RegionSudokuBoard(object):
         # After computing all these moves, add it to the table for whenever it is requested again
         self.moveListDict[self.key] = (possible_moves, mistake_moves)
         
-        none_taboo_possible_moves = [move for move in possible_moves if TabooMove(move[0].i, move[0].j, move[0].value) not in tabooMoves]
-        none_taboo_mistake_moves = [move for move in mistake_moves if TabooMove(move[0].i, move[0].j, move[0].value) not in tabooMoves]
+        none_taboo_possible_moves = [move for move in possible_moves if move[0] not in tabooMoves]
+        none_taboo_mistake_moves = [move for move in mistake_moves if move[0] not in tabooMoves]
 
         # Returns the set of moves
         return none_taboo_possible_moves, none_taboo_mistake_moves
@@ -784,7 +797,7 @@ class RegionSudokuBoard(object):
         return False
     
     def makeRandomMove(self, taboo_moves):
-        moves = [Move(cell.i, cell.j, index+1) for cell in self.cells for index, restrict in list(enumerate(cell.possibleValues)) if restrict == 0 and TabooMove(cell.i, cell.j, index+1) not in taboo_moves]
+        moves = [Move(cell.i, cell.j, index+1) for cell in self.cells for index, restrict in list(enumerate(cell.possibleValues)) if restrict == 0 and not taboo_moves.contains(cell.i, cell.j, index+1)]
         if len(moves) == 0:
             return "mistake", None, None, None
         madeMove = max(moves, key=lambda move: self.regionsFilledAfterMove(move))
@@ -0,0 +1,119 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Compares the in-process oracle with the output of the solve_sudoku program on the boards in the folder 'boards'.
+
+import os
+import unittest
+from pathlib import Path
+
+from competitive_sudoku.execute import solve_sudoku
+from competitive_sudoku.oracle import MoveResult, WitnessOracle, check_move, classify_moves, parse_move_output
+from competitive_sudoku.sudoku import Move, SudokuBoard, TabooMove, load_sudoku_from_text
+
+ROOT = Path(__file__).resolve().parent.parent
+SOLVE_SUDOKU = str(ROOT / 'bin' / ('solve_sudoku.exe' if os.name == 'nt' else 'solve_sudoku'))
+
+# A solved 2x2 sudoku, and positions in which (0, 0) is the only empty square of 3, 2, 1 or 0 of its regions
+SOLVED_2x2 = '''2 2
+   1   2   3   4
+   3   4   1   2
+   2   1   4   3
+   4   3   2   1
+'''
+
+REGIONS_3 = SOLVED_2x2.replace('   1   2   3   4', '   .   2   3   4')
+REGIONS_2 = REGIONS_3.replace('   3   4   1   2', '   3   .   1   2')
+REGIONS_1 = REGIONS_2.replace('   .   2   3   4', '   .   2   .   4')
+REGIONS_0 = REGIONS_3.replace('   .   2   3   4', '   .   .   3   4').replace('   3   4   1   2', '   .   4   1   2')
+
+
+def board_text(name: str) -> str:
+    return (ROOT / 'boards' / name).read_text()
+
+
+# The verdict of the solve_sudoku program on a move
+def solve_sudoku_move(text: str, move: Move) -> MoveResult:
+    board = load_sudoku_from_text(text)
+    return parse_move_output(solve_sudoku(SOLVE_SUDOKU, text, f'--move "{board.rc2f(move.i, move.j)} {move.value}"'))
+
+
+def empty_squares(board: SudokuBoard):
+    return [(i, j) for i in range(board.N) for j in range(board.N) if board.get(i, j) == SudokuBoard.empty]
+
+
+class OracleTest(unittest.TestCase):
+    def assertSameAsSolveSudoku(self, text: str, moves):
+        board = load_sudoku_from_text(text)
+        for move in moves:
+            self.assertEqual(solve_sudoku_move(text, move), check_move(board, move), f'{move}')
+
+    def test_legal_illegal_and_invalid_moves(self):
+        text = board_text('easy-2x2.txt')
+        board = load_sudoku_from_text(text)
+        self.assertEqual(MoveResult(MoveResult.SCORED, 7), check_move(board, Move(0, 3, 4)))
+        self.assertEqual(MoveResult(MoveResult.ILLEGAL), check_move(board, Move(0, 3, 1)))
+        self.assertEqual(MoveResult(MoveResult.INVALID), check_move(board, Move(0, 0, 4)))
+        self.assertEqual(MoveResult(MoveResult.INVALID), check_move(board, Move(0, 3, 5)))
+        moves = [Move(i, j, value) for i, j in empty_squares(board) for value in range(1, board.N + 1)]
+        self.assertSameAsSolveSudoku(text, moves + [Move(0, 0, 4)])
+
+    def test_unsolvable_moves(self):
+        text = board_text('unsolve-3x3.txt')
+        board = load_sudoku_from_text(text)
+        moves = [Move(0, 3, 5), Move(4, 4, 1), Move(8, 8, 9)]
+        for move in moves:
+            self.assertEqual(MoveResult(MoveResult.NO_SOLUTION), check_move(board, move))
+        self.assertSameAsSolveSudoku(text, moves + [Move(0, 3, 1)])
+
+        # a legal move that makes a solvable sudoku unsolvable: 3 must go to (1, 0) in this position
+        text = SOLVED_2x2.replace('   1   2   3   4', '   .   .   .   4').replace('   3   4   1   2', '   .   4   1   2')
+        self.assertEqual(MoveResult(MoveResult.NO_SOLUTION), check_move(load_sudoku_from_text(text), Move(0, 0, 3)))
+        self.assertSameAsSolveSudoku(text, [Move(0, 0, 3), Move(0, 0, 1), Move(1, 0, 3)])
+
+    def test_region_scores(self):
+        for text, score in [(REGIONS_0, 0), (REGIONS_1, 1), (REGIONS_2, 3), (REGIONS_3, 7)]:
+            self.assertEqual(MoveResult(MoveResult.SCORED, score), check_move(load_sudoku_from_text(text), Move(0, 0, 1)))
+            self.assertSameAsSolveSudoku(text, [Move(0, 0, 1)])
+
+    def test_classify_moves(self):
+        for name in ['easy-2x2.txt', 'random-2x3.txt', 'easy-3x3.txt', 'hard-3x3.txt', 'unsolve-3x3.txt']:
+            board = load_sudoku_from_text(board_text(name))
+            squares = empty_squares(board)
+            taboo_moves = [TabooMove(squares[0][0], squares[0][1], value) for value in range(1, board.N + 1)]
+            for taboo in [[], taboo_moves]:
+                result = classify_moves(board, taboo)
+                expected = {(i, j, value): check_move(board, Move(i, j, value)) for i, j in squares for value in range(1, board.N + 1)}
+                for move in taboo:
+                    if expected[(move.i, move.j, move.value)].status == MoveResult.SCORED:
+                        expected[(move.i, move.j, move.value)] = MoveResult(MoveResult.NO_SOLUTION)
+                self.assertEqual(expected, result, name)
+
+    def test_classify_moves_4x4(self):
+        # every move on an empty board keeps it solvable; this takes thousands of searches without guided witnesses
+        board = load_sudoku_from_text(board_text('empty-4x4.txt'))
+        result = classify_moves(board, [TabooMove(0, 0, 1)])
+        self.assertEqual(16 * 16 * 16, len(result))
+        self.assertEqual(MoveResult(MoveResult.NO_SOLUTION), result.pop((0, 0, 1)))
+        self.assertTrue(all(verdict == MoveResult(MoveResult.SCORED, 0) for verdict in result.values()))
+
+    def test_witness_oracle(self):
+        for name in ['easy-2x2.txt', 'random-2x3.txt', 'easy-3x3.txt']:
+            board = load_sudoku_from_text(board_text(name))
+            oracle = WitnessOracle(board)
+            # fill the board square by square, checking all values of every square before the move is played
+            for i, j in empty_squares(board):
+                accepted = None
+                for value in range(1, board.N + 1):
+                    move = Move(i, j, value)
+                    result = oracle.check_move(move)
+                    self.assertEqual(check_move(board, move), result, f'{name} {move}')
+                    if result.status == MoveResult.SCORED and accepted is None:
+                        accepted = move
+                board.put(i, j, accepted.value)
+                oracle.apply(accepted)
+
+
+if __name__ == '__main__':
+    unittest.main()
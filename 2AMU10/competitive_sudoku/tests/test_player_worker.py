@@ -0,0 +1,79 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import multiprocessing
+import signal
+import threading
+import time
+import unittest
+
+from competitive_sudoku.player_worker import _serve
+from competitive_sudoku.sudoku import GameState, SudokuBoard, TabooMove, TabooMoves, pack_move
+from competitive_sudoku.sudokuai import SudokuAI
+
+
+class BusySearch(SudokuAI):
+    """
+    Adds taboo moves to the game state and takes them back in a loop until it is interrupted, like the MCTS of
+    team43_A3 does for mistake moves.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.seen = []  # the taboo moves at the start of every turn
+
+    def compute_best_move(self, game_state: GameState) -> None:
+        taboo_moves = game_state.taboo_moves
+        self.seen.append((list(taboo_moves), dict(taboo_moves._counts)))
+        while True:
+            for value in range(1, 5):
+                taboo_moves.append(TabooMove(1, 1, value))
+                try:
+                    taboo_moves.append(TabooMove(2, 2, value))
+                    try:
+                        taboo_moves.contains(3, 3, value)
+                    finally:
+                        taboo_moves.pop()
+                finally:
+                    taboo_moves.pop()
+
+
+class PlayerWorkerTest(unittest.TestCase):
+    def test_interrupted_search_keeps_taboo_moves(self):
+        taboo_move = TabooMove(0, 0, 1)
+        board = SudokuBoard(2, 2)
+        game_state = GameState(board, board, TabooMoves([taboo_move]), [taboo_move], [0, 0])
+        player = BusySearch()
+        connection, child_connection = multiprocessing.Pipe()
+        stop_event = threading.Event()
+        turns = 50
+
+        # play the role of the referee: stop every turn after a short time, and end the game after the last one
+        def referee():
+            for turn in range(turns):
+                time.sleep(0.005)
+                stop_event.set()
+                connection.recv()
+                stop_event.clear()
+                connection.send(([], [0, 0], 0.005, None) if turn < turns - 1 else None)
+
+        handler = signal.getsignal(signal.SIGINT)
+        thread = threading.Thread(target=referee)
+        thread.start()
+        try:
+            _serve(player, child_connection, game_state, stop_event)
+        finally:
+            thread.join()
+            time.sleep(0.01)
+            signal.signal(signal.SIGINT, handler)
+
+        expected = ([taboo_move], {pack_move(0, 0, 1): 1})
+        self.assertEqual(turns, len(player.seen))
+        for seen in player.seen:
+            self.assertEqual(expected, seen)
+        self.assertEqual(expected, (list(game_state.taboo_moves), game_state.taboo_moves._counts))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import math
+import unittest
+
+from competitive_sudoku.rating import ELO_PER_NEPER, RatingTable, elo_difference, expected_score
+
+
+class RatingTest(unittest.TestCase):
+    def test_expected_score(self):
+        self.assertEqual(0.5, expected_score(0))
+        self.assertAlmostEqual(10 / 11, expected_score(400))
+        self.assertAlmostEqual(1 / 11, expected_score(-400))
+        for difference in [-300, -50, 0, 120, 700]:
+            self.assertAlmostEqual(difference, elo_difference(expected_score(difference)))
+        self.assertEqual(math.inf, elo_difference(1))
+        self.assertEqual(-math.inf, elo_difference(0))
+
+    def test_two_players(self):
+        # 4.5 out of 6 points is a strength ratio of 3, i.e. a rating difference of 400 log10(3)
+        table = RatingTable(prior_draws=0)
+        for points in [1, 1, 0.5, 0.5, 1]:
+            table.add_result('A', 'B', points)
+        table.add_result('B', 'A', 0.5)
+        (a, rating_a, _, games_a, score_a), (b, rating_b, _, games_b, score_b) = table.ratings()
+        self.assertEqual(('A', 'B'), (a, b))
+        self.assertAlmostEqual(200 * math.log10(3), rating_a)
+        self.assertAlmostEqual(-200 * math.log10(3), rating_b)
+        self.assertEqual((6, 6), (games_a, games_b))
+        self.assertAlmostEqual(0.75, score_a)
+        self.assertAlmostEqual(0.25, score_b)
+
+    def test_prior(self):
+        # with 2 virtual draws A has 4 out of 6 points; the error follows from the information 6 * 2/3 * 1/3
+        table = RatingTable(prior_draws=2)
+        for points in [1, 1, 1, 0]:
+            table.add_result('A', 'B', points)
+        ratings = table.ratings()
+        self.assertAlmostEqual(400 * math.log10(2), ratings[0][1] - ratings[1][1])
+        self.assertAlmostEqual(1.96 * ELO_PER_NEPER / math.sqrt(4 / 3), ratings[0][2], places=6)
+
+        # a player that won all its games still gets a finite rating
+        table = RatingTable()
+        for _ in range(10):
+            table.add_result('A', 'B', 1)
+        self.assertTrue(math.isfinite(table.ratings()[0][1]))
+
+    def test_three_players(self):
+        # A beats B and B beats C with the same score, so the ratings are equally spaced and average to 0
+        table = RatingTable(prior_draws=0)
+        for first, second in [('A', 'B'), ('B', 'C')]:
+            for points in [1, 1, 1, 0]:
+                table.add_result(first, second, points)
+        ratings = {player: rating for player, rating, _, _, _ in table.ratings()}
+        self.assertAlmostEqual(0.0, sum(ratings.values()), places=6)
+        self.assertAlmostEqual(ratings['A'] - ratings['B'], ratings['B'] - ratings['C'], places=6)
+        self.assertEqual(['A', 'B', 'C'], [row[0] for row in table.ratings()])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from competitive_sudoku.results_db import ResultsDatabase
+from competitive_sudoku.sudoku import Move, TabooMove
+
+
+def game_result(winner: int):
+    return SimpleNamespace(winner=winner, scores=[3, 1], moves=[Move(0, 0, 1), TabooMove(1, 1, 1)], move_times=[0.1, 0.2])
+
+
+class ResultsDatabaseTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, 'games.db')
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_results_of_versions(self):
+        with ResultsDatabase(self.path) as results:
+            results.add_game('A', 'B', 'board.txt', 1.0, 1, game_result(1), 'key1', 'a1', 'b1')
+            results.add_game('B', 'A', 'board.txt', 1.0, 2, game_result(0), 'key2', 'b1', 'a2')
+            results.add_game('A', 'B', 'board.txt', 1.0, 3, game_result(2), 'key3', 'a2', 'b1')
+            results.add_game('A', 'C', 'board.txt', 1.0, 1, game_result(1), 'key4', 'a2', 'c1')
+            self.assertEqual([('A', 'B', 1.0), ('B', 'A', 0.5), ('A', 'B', 0.0)], list(results.results(['A', 'B'])))
+            self.assertEqual([('B', 'A', 0.5), ('A', 'B', 0.0)], list(results.results(['A', 'B'], {'A': 'a2', 'B': 'b1'})))
+            self.assertEqual([], list(results.results(['A', 'B'], {'A': 'a3', 'B': 'b1'})))
+
+            winner, scores, moves, move_times = results.find_game('key1')
+            self.assertEqual((1, [3, 1], [0.1, 0.2]), (winner, scores, move_times))
+            self.assertEqual([Move(0, 0, 1), TabooMove(1, 1, 1)], moves)
+            self.assertIsInstance(moves[1], TabooMove)
+
+    def test_old_database(self):
+        # a database of an older version, without keys and hashes, is extended; its games only count for all versions
+        connection = sqlite3.connect(self.path)
+        connection.execute('CREATE TABLE games (id INTEGER PRIMARY KEY AUTOINCREMENT, first TEXT NOT NULL, second TEXT NOT NULL, '
+                           'board TEXT NOT NULL, time REAL NOT NULL, game INTEGER NOT NULL, winner INTEGER NOT NULL, '
+                           'score1 INTEGER NOT NULL, score2 INTEGER NOT NULL, moves TEXT NOT NULL, move_times TEXT NOT NULL, '
+                           'played TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)')
+        connection.execute("INSERT INTO games (first, second, board, time, game, winner, score1, score2, moves, move_times) "
+                           "VALUES ('A', 'B', 'board.txt', 1.0, 1, 1, 3, 1, '[]', '[]')")
+        connection.commit()
+        connection.close()
+
+        with ResultsDatabase(self.path) as results:
+            results.add_game('A', 'B', 'board.txt', 1.0, 2, game_result(2), 'key2', 'a1', 'b1')
+            self.assertEqual([('A', 'B', 1.0), ('A', 'B', 0.0)], list(results.results(['A', 'B'])))
+            self.assertEqual([('A', 'B', 0.0)], list(results.results(['A', 'B'], {'A': 'a1', 'B': 'b1'})))
+
+
+if __name__ == '__main__':
+    unittest.main()
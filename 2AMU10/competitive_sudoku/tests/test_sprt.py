@@ -0,0 +1,55 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import math
+import unittest
+
+from competitive_sudoku.sprt import SPRT
+
+
+class SPRTTest(unittest.TestCase):
+    def test_bounds(self):
+        sprt = SPRT(alpha=0.05, beta=0.05)
+        self.assertAlmostEqual(-math.log(19), sprt.lower_bound)
+        self.assertAlmostEqual(math.log(19), sprt.upper_bound)
+        self.assertRaises(ValueError, SPRT, 50, 0)
+        self.assertRaises(ValueError, SPRT, 0, 50, 0.0)
+
+    def test_llr(self):
+        sprt = SPRT(elo0=0, elo1=50)
+        self.assertEqual(0.0, sprt.llr())
+        self.assertIsNone(sprt.status())
+
+        # W-D-L 6-2-2: score 0.7, variance 0.16 and expected scores 0.5 and 1 / (1 + 10^(-50/400))
+        for points in [1] * 6 + [0.5] * 2 + [0] * 2:
+            sprt.add_result(points)
+        score1 = 1 / (1 + 10 ** (-0.125))
+        self.assertEqual((6, 2, 2), (sprt.wins, sprt.draws, sprt.losses))
+        self.assertAlmostEqual(10 * (score1 - 0.5) * (1.4 - 0.5 - score1) / 0.32, sprt.llr())
+        self.assertAlmostEqual(0.733696, sprt.llr(), places=6)
+        self.assertIsNone(sprt.status())
+
+    def test_status(self):
+        # every win adds 0.1328 to the LLR, so H1 is accepted after 23 wins
+        sprt = SPRT(elo0=0, elo1=50)
+        for _ in range(22):
+            sprt.add_result(1)
+        self.assertIsNone(sprt.status())
+        sprt.add_result(1)
+        self.assertEqual('H1', sprt.status())
+
+        sprt = SPRT(elo0=0, elo1=50)
+        for _ in range(20):
+            sprt.add_result(0)
+        self.assertEqual('H0', sprt.status())
+
+        # equal players: the score is in the middle of H0 and H1 only for a rating difference of 25
+        sprt = SPRT(elo0=0, elo1=50)
+        while sprt.status() is None:
+            sprt.add_result(1 if sprt.games() % 2 == 0 else 0)
+        self.assertEqual('H0', sprt.status())
+
+
+if __name__ == '__main__':
+    unittest.main()
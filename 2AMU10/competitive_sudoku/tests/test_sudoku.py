@@ -0,0 +1,203 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import copy
+import pickle
+import random
+import unittest
+from collections import Counter
+from pathlib import Path
+
+from competitive_sudoku.sudoku import BitmaskSudokuBoard, GameState, Move, SudokuBoard, TabooMove, TabooMoves, load_sudoku, pack_move
+from competitive_sudoku.zobrist import ZobristSudokuBoard
+
+
+class TabooMovesTest(unittest.TestCase):
+    def assertConsistent(self, taboo_moves: TabooMoves):
+        self.assertEqual(dict(Counter(pack_move(move.i, move.j, move.value) for move in taboo_moves)), taboo_moves._counts)
+
+    def test_membership(self):
+        taboo_moves = TabooMoves([TabooMove(0, 1, 2), TabooMove(3, 4, 5)])
+        self.assertIn(TabooMove(0, 1, 2), taboo_moves)
+        self.assertIn(Move(0, 1, 2), taboo_moves)
+        self.assertNotIn(Move(0, 1, 3), taboo_moves)
+        self.assertNotIn((0, 1, 2), taboo_moves)
+        self.assertTrue(taboo_moves.contains(3, 4, 5))
+        self.assertFalse(taboo_moves.contains(4, 3, 5))
+        self.assertConsistent(taboo_moves)
+
+    def test_updates(self):
+        a, b, c = TabooMove(0, 0, 1), TabooMove(1, 1, 2), TabooMove(2, 2, 3)
+        taboo_moves = TabooMoves()
+        taboo_moves.append(a)
+        taboo_moves.append(a)
+        taboo_moves.extend([b, c])
+        taboo_moves.insert(0, c)
+        self.assertEqual([c, a, a, b, c], taboo_moves)
+        self.assertConsistent(taboo_moves)
+
+        # a move that occurs twice stays taboo until both are removed
+        self.assertEqual(c, taboo_moves.pop())
+        self.assertIn(c, taboo_moves)
+        self.assertEqual(c, taboo_moves.pop(0))
+        self.assertNotIn(c, taboo_moves)
+        taboo_moves.remove(a)
+        self.assertIn(a, taboo_moves)
+        self.assertConsistent(taboo_moves)
+
+        taboo_moves += [c]
+        self.assertConsistent(taboo_moves)
+        result = taboo_moves + [TabooMove(3, 3, 4)]
+        self.assertIsInstance(result, TabooMoves)
+        self.assertNotIn(TabooMove(3, 3, 4), taboo_moves)
+        self.assertConsistent(result)
+
+        taboo_moves.clear()
+        self.assertEqual([], taboo_moves)
+        self.assertConsistent(taboo_moves)
+
+    def test_item_and_slice_assignment(self):
+        moves = [TabooMove(i, i, i + 1) for i in range(6)]
+        taboo_moves = TabooMoves(moves)
+        taboo_moves[0] = TabooMove(5, 5, 5)
+        self.assertNotIn(moves[0], taboo_moves)
+        self.assertConsistent(taboo_moves)
+        taboo_moves[1:3] = [TabooMove(7, 7, 7)]
+        self.assertNotIn(moves[1], taboo_moves)
+        self.assertIn(TabooMove(7, 7, 7), taboo_moves)
+        self.assertConsistent(taboo_moves)
+        del taboo_moves[-1]
+        self.assertNotIn(moves[5], taboo_moves)
+        self.assertConsistent(taboo_moves)
+        del taboo_moves[:2]
+        self.assertConsistent(taboo_moves)
+        taboo_moves[:] = moves
+        self.assertEqual(moves, taboo_moves)
+        self.assertConsistent(taboo_moves)
+
+    def test_copies(self):
+        taboo_moves = TabooMoves([TabooMove(0, 0, 1), TabooMove(1, 2, 3), TabooMove(0, 0, 1)])
+        copies = [taboo_moves.copy(), copy.copy(taboo_moves), copy.deepcopy(taboo_moves), pickle.loads(pickle.dumps(taboo_moves))]
+        for other in copies:
+            self.assertIsInstance(other, TabooMoves)
+            self.assertEqual(taboo_moves, other)
+            self.assertConsistent(other)
+
+            # the copies have their own counts
+            other.remove(TabooMove(0, 0, 1))
+            other.remove(TabooMove(0, 0, 1))
+            self.assertNotIn(TabooMove(0, 0, 1), other)
+            self.assertIn(TabooMove(0, 0, 1), taboo_moves)
+            self.assertConsistent(taboo_moves)
+            self.assertConsistent(other)
+
+
+
+class GameStateTest(unittest.TestCase):
+    @staticmethod
+    def snapshot(game_state: GameState):
+        board = game_state.board
+        return (list(board.squares), list(board.rows), list(board.cols), list(board.boxes), board.zobrist_key,
+                board.taboo_key, list(game_state.taboo_moves), dict(game_state.taboo_moves._counts),
+                list(game_state.moves), list(game_state.scores), len(game_state.trail))
+
+    def test_apply_and_undo(self):
+        board = ZobristSudokuBoard(2, 3)
+        board.put(0, 0, 1)
+        taboo_move = TabooMove(5, 5, 1)
+        board.add_taboo_move(taboo_move)
+        game_state = GameState(SudokuBoard(2, 3), board, [taboo_move], [Move(0, 0, 1), taboo_move], [1, 0])
+
+        # the moves of both players, with taboo moves in between and a taboo move that occurs twice
+        moves = [(Move(1, 1, 2), 0), (TabooMove(2, 2, 3), 0), (Move(5, 5, 6), 1), (TabooMove(5, 5, 1), 0),
+                 (Move(0, 1, 3), 3), (Move(0, 2, 4), 7)]
+        snapshots = []
+        for move, score in moves:
+            snapshots.append(self.snapshot(game_state))
+            player = len(game_state.moves) % 2
+            game_state.apply(move, score)
+            self.assertEqual(move, game_state.moves[-1])
+            self.assertEqual(snapshots[-1][9][player] + score, game_state.scores[player])
+            if isinstance(move, TabooMove):
+                self.assertIn(move, game_state.taboo_moves)
+            else:
+                self.assertEqual(move.value, board.get(move.i, move.j))
+            self.assertEqual(ZobristSudokuBoard.from_board(board, game_state.taboo_moves).zobrist_key, board.zobrist_key)
+
+        for move, _ in reversed(moves):
+            self.assertIs(move, game_state.undo())
+            self.assertEqual(snapshots.pop(), self.snapshot(game_state))
+
+        self.assertEqual(TabooMoves([taboo_move]), game_state.taboo_moves)
+        self.assertEqual(1, game_state.taboo_moves._counts[pack_move(5, 5, 1)])
+
+
+
+# The moves that do not violate a constraint, computed by scanning the row, the column and the region of every square
+def brute_force_moves(board: SudokuBoard):
+    m, n, N = board.m, board.n, board.N
+    moves = []
+    for i in range(N):
+        for j in range(N):
+            if board.get(i, j) != SudokuBoard.empty:
+                continue
+            used = {board.get(i, c) for c in range(N)} | {board.get(r, j) for r in range(N)}
+            used |= {board.get(r, c) for r in range(i // m * m, i // m * m + m) for c in range(j // n * n, j // n * n + n)}
+            moves.extend(Move(i, j, value) for value in range(1, N + 1) if value not in used)
+    return moves
+
+
+class BitmaskSudokuBoardTest(unittest.TestCase):
+    # The boards in the folder 'boards' with shapes 2x2, 2x3 and 3x3, and positions that are reached from empty boards
+    # of these shapes by random legal moves
+    def boards(self):
+        root = Path(__file__).resolve().parent.parent / 'boards'
+        boards = [load_sudoku(str(root / name)) for name in ['easy-2x2.txt', 'empty-2x3.txt', 'random-2x3.txt', 'easy-3x3.txt', 'hard-3x3.txt', 'random-3x3.txt']]
+        generator = random.Random(1)
+        for m, n in [(2, 2), (2, 3), (3, 3)]:
+            for count in [3, 10, 25]:
+                board = SudokuBoard(m, n)
+                for _ in range(count):
+                    moves = brute_force_moves(board)
+                    if moves:
+                        move = generator.choice(moves)
+                        board.put(move.i, move.j, move.value)
+                boards.append(board)
+        return boards
+
+    def test_legal_moves(self):
+        for board in self.boards():
+            bitmask_board = BitmaskSudokuBoard.from_board(board)
+            expected = brute_force_moves(board)
+            self.assertEqual(expected, bitmask_board.legal_moves())
+            for i in range(board.N):
+                for j in range(board.N):
+                    values = [move.value for move in expected if (move.i, move.j) == (i, j)]
+                    self.assertEqual(values, bitmask_board.candidate_values(i, j))
+                    self.assertEqual(sum(1 << (value - 1) for value in values), bitmask_board.candidates(i, j))
+                    for value in range(0, board.N + 2):
+                        self.assertEqual(value in values, bitmask_board.is_legal(i, j, value))
+
+            taboo_moves = expected[::3]
+            self.assertEqual([move for move in expected if move not in taboo_moves], bitmask_board.legal_moves(taboo_moves))
+
+    def test_put(self):
+        for board in self.boards():
+            bitmask_board = BitmaskSudokuBoard.from_board(board)
+            # clear every filled square and put its value back, the masks must match the ones computed from scratch
+            for k, value in enumerate(board.squares):
+                if value == SudokuBoard.empty:
+                    continue
+                i, j = board.f2rc(k)
+                bitmask_board.put(i, j, SudokuBoard.empty)
+                self.assertEqual(brute_force_moves(bitmask_board), bitmask_board.legal_moves())
+                rebuilt = BitmaskSudokuBoard.from_board(bitmask_board)
+                self.assertEqual((rebuilt.rows, rebuilt.cols, rebuilt.boxes), (bitmask_board.rows, bitmask_board.cols, bitmask_board.boxes))
+                bitmask_board.put(i, j, value)
+            self.assertEqual(board.squares, bitmask_board.squares)
+            self.assertEqual(brute_force_moves(board), bitmask_board.legal_moves())
+
+
+if __name__ == '__main__':
+    unittest.main()
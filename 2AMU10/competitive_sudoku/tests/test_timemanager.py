@@ -0,0 +1,69 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import time
+import unittest
+from pathlib import Path
+
+from competitive_sudoku.sudoku import GameState, Move, SudokuBoard, load_sudoku_from_text
+from competitive_sudoku.sudokuai import SearchBudget, SudokuAI
+from team43_A2.regionsudokuboard import RegionSudokuBoard
+from team43_A2.timemanager import CLEAR_FACTOR, MIN_SHARE, TimeManager
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def region_board(board: SudokuBoard) -> RegionSudokuBoard:
+    return RegionSudokuBoard(GameState(board, board, [], [], [0, 0]))
+
+
+def time_manager(board: SudokuBoard, move_count: int = 10, budget: SearchBudget = None) -> TimeManager:
+    ai = SudokuAI()
+    ai.budget = budget
+    ai.deadline = time.monotonic() + 10
+    return TimeManager(ai, region_board(board), move_count, [])
+
+
+class TimeManagerTest(unittest.TestCase):
+    def test_copies_are_equal(self):
+        self.assertEqual((ROOT / 'team43_A2' / 'timemanager.py').read_bytes(), (ROOT / 'team43_A3' / 'timemanager.py').read_bytes())
+
+    def test_quiet_position(self):
+        manager = time_manager(SudokuBoard(3, 3))
+        move = Move(0, 0, 1)
+        manager.update(move, False)
+        self.assertFalse(manager.shouldStop())
+
+        # a stable and clear best move on an empty board gets CLEAR_FACTOR of MIN_SHARE of the time
+        manager.update(move, True)
+        manager.update(move, True)
+        manager.start -= 0.9 * CLEAR_FACTOR * MIN_SHARE * manager.available
+        self.assertFalse(manager.shouldStop())
+        manager.start -= 0.2 * CLEAR_FACTOR * MIN_SHARE * manager.available
+        self.assertTrue(manager.shouldStop())
+
+        # a best move that just changed gets the full time
+        manager.update(Move(0, 0, 2), True)
+        self.assertFalse(manager.shouldStop())
+
+    def test_forced_critical_and_budget(self):
+        move = Move(0, 0, 1)
+        manager = time_manager(SudokuBoard(3, 3), move_count=1)
+        manager.update(move, False)
+        self.assertTrue(manager.shouldStop())
+
+        # a region of easy-2x2 misses one square, so the position is critical and all time is used
+        manager = time_manager(load_sudoku_from_text((ROOT / 'boards' / 'easy-2x2.txt').read_text()))
+        for _ in range(5):
+            manager.update(move, True)
+        manager.start -= manager.available / 2
+        self.assertFalse(manager.shouldStop())
+
+        manager = time_manager(SudokuBoard(3, 3), move_count=1, budget=SearchBudget(iterations=10))
+        manager.update(move, True)
+        self.assertFalse(manager.shouldStop())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import os
+import pickle
+import random
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+from competitive_sudoku.sudoku import GameState, Move, SudokuBoard, TabooMove, TabooMoves
+from competitive_sudoku.zobrist import ZobristSudokuBoard, zobrist_table
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def fresh_key(board: ZobristSudokuBoard, taboo_moves) -> int:
+    return ZobristSudokuBoard.from_board(board, taboo_moves).zobrist_key
+
+
+class ZobristTest(unittest.TestCase):
+    def test_tables(self):
+        table = zobrist_table(2, 3)
+        self.assertEqual(6, len(table))
+        self.assertEqual((6, 7), (len(table[0]), len(table[0][0])))
+        zobrist_table.cache_clear()
+        self.assertEqual(table, zobrist_table(2, 3))
+        self.assertNotEqual(table, zobrist_table(2, 3, 'taboo'))
+        self.assertNotEqual(table, zobrist_table(3, 2))
+
+        # the tables do not depend on the process, e.g. on the hash seed of strings. The hash of a tuple of integers
+        # does not depend on it, so equal outputs mean equal tables.
+        script = 'from competitive_sudoku.zobrist import zobrist_table; print(hash(zobrist_table(3, 3, "taboo")))'
+        outputs = set()
+        for seed in ['1', '2']:
+            environment = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=str(ROOT))
+            outputs.add(subprocess.check_output([sys.executable, '-c', script], env=environment, cwd=str(ROOT)).strip())
+        self.assertEqual({str(hash(zobrist_table(3, 3, 'taboo'))).encode()}, outputs)
+
+    def test_incremental_key(self):
+        generator = random.Random(3)
+        for m, n in [(2, 2), (2, 3), (3, 3)]:
+            board = ZobristSudokuBoard(m, n)
+            taboo_moves = []
+            self.assertEqual(fresh_key(board, taboo_moves), board.zobrist_key)
+            N = board.N
+            for _ in range(200):
+                i, j, value = generator.randrange(N), generator.randrange(N), generator.randrange(1, N + 1)
+                action = generator.random()
+                if action < 0.2 and taboo_moves:
+                    board.remove_taboo_move(taboo_moves.pop(generator.randrange(len(taboo_moves))))
+                elif action < 0.4:
+                    taboo_moves.append(TabooMove(i, j, value))
+                    board.add_taboo_move(taboo_moves[-1])
+                elif action < 0.6:
+                    board.put(i, j, SudokuBoard.empty)
+                else:
+                    # the key does not care about the constraints, so a value may also be overwritten
+                    board.put(i, j, value)
+                self.assertEqual(fresh_key(board, taboo_moves), board.zobrist_key)
+
+            # the key only depends on the position, not on the way it was reached
+            board.squares = [SudokuBoard.empty] * (N * N)
+            board.rebuild()
+            for move in list(taboo_moves):
+                board.remove_taboo_move(move)
+            self.assertEqual(ZobristSudokuBoard(m, n).zobrist_key, board.zobrist_key)
+
+    def test_pickle(self):
+        board = ZobristSudokuBoard(2, 3)
+        board.put(0, 0, 1)
+        board.put(3, 4, 2)
+        board.add_taboo_move(TabooMove(1, 1, 3))
+        # the tables are not pickled, but shared with the other boards of the same shape after unpickling
+        data = pickle.dumps(board)
+        self.assertLess(len(data), len(pickle.dumps(zobrist_table(2, 3))))
+        restored = pickle.loads(data)
+        self.assertEqual(board.zobrist_key, restored.zobrist_key)
+        self.assertEqual(board.taboo_key, restored.taboo_key)
+        self.assertIs(zobrist_table(2, 3), restored.square_keys)
+        self.assertIs(zobrist_table(2, 3, 'taboo'), restored.taboo_keys)
+        restored.put(5, 5, 4)
+        restored.remove_taboo_move(TabooMove(1, 1, 3))
+        self.assertEqual(fresh_key(restored, []), restored.zobrist_key)
+
+    def test_synced_game_state(self):
+        # A persistent worker receives a pickled game state and then applies the moves of the referee, including the
+        # taboo moves, see competitive_sudoku.player_worker. The key must include the taboo moves.
+        board = ZobristSudokuBoard(2, 2)
+        game_state = GameState(SudokuBoard(2, 2), board, TabooMoves(), [], [0, 0])
+        game_state.apply(Move(0, 0, 1))
+        worker_state = pickle.loads(pickle.dumps(game_state))
+        for move in [TabooMove(1, 1, 1), Move(1, 1, 2), TabooMove(2, 2, 2), Move(3, 3, 3)]:
+            game_state.apply(move)
+            worker_state.apply(move)
+            self.assertEqual(game_state.board.zobrist_key, worker_state.board.zobrist_key)
+            self.assertEqual(fresh_key(worker_state.board, worker_state.taboo_moves), worker_state.board.zobrist_key)
+
+
+if __name__ == '__main__':
+    unittest.main()
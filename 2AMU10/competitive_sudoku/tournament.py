@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+
+#  (C) Copyright Wieger Wesselink 2021. Distributed under the GPL-3.0-or-later
+#  Software License, (See accompanying file LICENSE or copy at
+#  https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import argparse
+import concurrent.futures
+import os
+import subprocess
+import sys
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from competitive_sudoku.game_queue import GameBroker
+from competitive_sudoku.rating import RatingTable
+from competitive_sudoku.results_db import ResultsDatabase, decode_moves, game_key, hash_file
+from play_match import play_game, print_score
+from simulate_game import GameResult, default_solve_sudoku_path, load_player, player_hash
+
+
+# Find all player modules of the team, including the ones in Sub_Iterations_A1.
+def find_players() -> List[str]:
+    root = Path(__file__).resolve().parent
+    players = sorted(path.name for path in root.glob('team*') if (path / 'sudokuai.py').is_file())
+    players += sorted(f'Sub_Iterations_A1/{path.name}' for path in root.glob('Sub_Iterations_A1/*') if (path / 'sudokuai.py').is_file())
+    return players
+
+
+# Remove the players that cannot be loaded, e.g. because a package that they need is not installed.
+def loadable_players(players: List[str]) -> List[str]:
+    result = []
+    for player in players:
+        try:
+            load_player(player, 1, default_solve_sudoku_path())
+            result.append(player)
+        except Exception as err:
+            print(f'Skipping {player}: {err}')
+    return result
+
+
+# Create the list of games (first, second, board, time, game index). Every pairing plays count games on every board
+# with every time control, and the players take turns in moving first.
+def schedule(players: List[str], boards: List[str], times: List[float], count: int) -> List[Tuple[str, str, str, float, int]]:
+    games = []
+    for board in boards:
+        for calculation_time in times:
+            for player, opponent in combinations(players, 2):
+                for i in range(1, count+1):
+                    first, second = (player, opponent) if i % 2 == 1 else (opponent, player)
+                    games.append((first, second, board, calculation_time, i))
+    return games
+
+
+# Play the games in a pool of processes on this machine. Yields the games with their results in the order in which
+# they are finished. The result is None if the game failed.
+def play_local(games: List[Tuple[str, str, str, float, int]], jobs: int, output_dir: str, early_finish: bool) -> Iterator[Tuple[Tuple, Optional[GameResult]]]:
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {}
+        for game in games:
+            first, second, board, calculation_time, i = game
+            name = f'{first}-{second}-game={i}-board={Path(board).stem}-time={calculation_time}'.replace('/', '.')
+            output_file = os.path.join(output_dir, name + '.txt')
+            futures[executor.submit(play_game, first, second, board, calculation_time, output_file, early_finish, True)] = game
+
+        for future in concurrent.futures.as_completed(futures):
+            first, second, board, _, _ = futures[future]
+            try:
+                yield futures[future], future.result()
+            except Exception as err:
+                print(f'Error: the game {first} - {second} on {board} failed: {err}')
+                yield futures[future], None
+
+
+# Hand out the games to workers via a GameBroker that listens on the given port. The workers run game_worker.py,
+# possibly on other machines; jobs of them are started on this machine. Yields the games with their results in the
+# order in which they are finished. The result is None if the game failed.
+def play_distributed(games: List[Tuple[str, str, str, float, int]], keys: Dict[Tuple, str], player_hashes: Dict[str, str], port: int, jobs: int, lease_time: float, output_dir: str, early_finish: bool) -> Iterator[Tuple[Tuple, Optional[GameResult]]]:
+    board_texts = {board: Path(board).read_text() for board in set(game[2] for game in games)}
+    broker_jobs = []
+    for game in games:
+        first, second, board, calculation_time, i = game
+        broker_jobs.append({'first': first, 'second': second, 'board': board, 'board_text': board_texts[board],
+                            'time': calculation_time, 'game': i, 'seed': int(keys[game][:8], 16), 'early_finish': early_finish,
+                            'first_hash': player_hashes[first], 'second_hash': player_hashes[second]})
+    with GameBroker(broker_jobs, host='', port=port, lease_time=lease_time) as broker:
+        print(f'The broker is listening on port {broker.address[1]}')
+        worker_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'game_worker.py')
+        workers = [subprocess.Popen([sys.executable, worker_script, '--broker', f'localhost:{broker.address[1]}', '--output-dir', output_dir, '--patience', '5'],
+                                    stdout=subprocess.DEVNULL) for _ in range(jobs)]
+        try:
+            for job, result in broker.results():
+                game = (job['first'], job['second'], job['board'], job['time'], job['game'])
+                if 'error' in result:
+                    print(f'Error: the game {job["first"]} - {job["second"]} on {job["board"]} failed: {result["error"]}')
+                    yield game, None
+                else:
+                    yield game, GameResult.from_moves(result['winner'], result['scores'], decode_moves(result['moves']), result['move_times'])
+        except RuntimeError as err:
+            print(f'Error: {err}. The finished games are stored; run the tournament again to play the other games.')
+    for worker in workers:
+        worker.wait()
+
+
+def play_tournament(players: List[str], boards: List[str], times: List[float], count: int, jobs: int, database: str, output_dir: str, early_finish: bool = False, port: Optional[int] = None, lease_time: float = 600.0, all_versions: bool = False) -> None:
+    games = schedule(players, boards, times, count)
+    os.makedirs(output_dir, exist_ok=True)
+    player_hashes = {player: player_hash(player) for player in players}
+    board_hashes = {board: hash_file(board) for board in boards}
+
+    with ResultsDatabase(database) as results:
+        # the games that were played before with the same versions of the players are not played again
+        keys = {game: game_key(player_hashes[game[0]], player_hashes[game[1]], board_hashes[game[2]], game[3], game[4], early_finish) for game in games}
+        played = {game for game in games if results.find_game(keys[game]) is not None}
+        games = [game for game in games if game not in played]
+        if played:
+            print(f'Skipping {len(played)} games that were played before')
+        print(f'Playing {len(games)} games between {len(players)} players')
+
+        # the ratings also take the games of previous tournaments between the same versions of the players into account,
+        # or between all versions if all_versions is set
+        table = RatingTable()
+        for player in players:
+            table.add_player(player)
+        for first, second, points in results.results(players, None if all_versions else player_hashes):
+            table.add_result(first, second, points)
+
+        if port is None:
+            finished_games = play_local(games, jobs, output_dir, early_finish)
+        else:
+            finished_games = play_distributed(games, keys, player_hashes, port, jobs, lease_time, output_dir, early_finish)
+
+        for number, (game, result) in enumerate(finished_games, 1):
+            if result is None:
+                continue
+            first, second, board, calculation_time, i = game
+            results.add_game(first, second, board, calculation_time, i, result, keys[game], player_hashes[first], player_hashes[second])
+            points = result.points()
+            table.add_result(first, second, points[0])
+            print(f'[{number}/{len(games)}] {first} - {second} {print_score(points[0])}-{print_score(points[1])} ({Path(board).stem}, time={calculation_time})')
+            if number % 10 == 0:
+                print(table)
+
+    print(table)
+
+
+def main():
+    cmdline_parser = argparse.ArgumentParser(description='Play a round-robin tournament between sudoku players.')
+    cmdline_parser.add_argument('--players', nargs='+', help='The module names of the players (default: all team43 modules, including Sub_Iterations_A1)')
+    cmdline_parser.add_argument('--boards', nargs='+', default=['boards/empty-2x2.txt'], help='The text files containing the start positions (default: boards/empty-2x2.txt)')
+    cmdline_parser.add_argument('--times', nargs='+', type=float, default=[1.0], help='The times (in seconds) for computing a move (default: 1.0)')
+    cmdline_parser.add_argument('--count', type=int, default=2, help='The number of games per pairing, board and time (default: 2)')
+    cmdline_parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='The number of games that are played concurrently on this machine (default: the number of CPUs)')
+    cmdline_parser.add_argument('--database', type=str, default='tournament.db', help='The sqlite database that stores the results (default: tournament.db)')
+    cmdline_parser.add_argument('--output-dir', type=str, default='tournament-games', help='The folder for the output of the games (default: tournament-games)')
+    cmdline_parser.add_argument('--early-finish', action='store_true', help='Continue with the next move as soon as a player is done with its move')
+    cmdline_parser.add_argument('--broker', type=int, metavar='PORT', help='Hand out the games to workers (game_worker.py) on any machine via a broker that listens on this port; --jobs workers are started on this machine')
+    cmdline_parser.add_argument('--all-versions', action='store_true', help='Include the stored games of other versions of the players in the ratings')
+    cmdline_parser.add_argument('--lease-time', type=float, default=600.0, help='The time in seconds after which the broker hands out an unfinished game again (default: 600)')
+    args = cmdline_parser.parse_args()
+
+    players = loadable_players(args.players or find_players())
+    if len(players) < 2:
+        print('At least two players are needed for a tournament.')
+        return
+    play_tournament(players, args.boards, args.times, args.count, args.jobs, args.database, args.output_dir, args.early_finish, args.broker, args.lease_time, args.all_versions)
+
+
+if __name__ == '__main__':
+    main()